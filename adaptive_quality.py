@@ -0,0 +1,133 @@
+import ipaddress
+import threading
+import time
+
+
+# 스트림 화질 단계: (너비, 높이, JPEG 품질, 최대 FPS) - 0이 가장 높은 화질
+QUALITY_LEVELS = [
+    (640, 480, 80, 30),
+    (480, 360, 65, 20),
+    (320, 240, 55, 12),
+    (240, 180, 45, 6),
+]
+
+# 적응형 제어를 쓰지 않는 시청자(MJPEG 등)의 기본 단계 (기존 480x360, 품질 65)
+DEFAULT_LEVEL = 1
+
+
+def parse_trusted_proxies(values):
+    """신뢰할 프록시 주소/대역 목록(예: ["10.0.0.5", "172.16.0.0/12"])을 네트워크 객체로 변환합니다."""
+    networks = []
+    for value in values or []:
+        try:
+            networks.append(ipaddress.ip_network(str(value).strip(), strict=False))
+        except ValueError:
+            print(f"⚠️ 잘못된 trusted_proxies 항목을 무시합니다: {value}")
+    return networks
+
+
+def _parse_ip(address):
+    try:
+        return ipaddress.ip_address((address or '').strip())
+    except ValueError:
+        return None
+
+
+def _is_trusted_proxy(ip, trusted_proxies):
+    return ip is not None and (ip.is_loopback or any(ip in network for network in trusted_proxies))
+
+
+def client_address(remote_addr, forwarded_for=None, trusted_proxies=()):
+    """실제 접속 주소를 반환합니다.
+
+    전달 헤더(CF-Connecting-IP / X-Forwarded-For)는 누구나 보낼 수 있으므로 직접 연결한 주소가
+    로컬(터널) 또는 trusted_proxies의 프록시일 때만 사용합니다. X-Forwarded-For는 오른쪽부터
+    신뢰하는 프록시를 건너뛴 첫 주소를 사용합니다. (클라이언트가 앞에 덧붙인 주소는 무시)
+    """
+    address = remote_addr
+    if forwarded_for and _is_trusted_proxy(_parse_ip(remote_addr), trusted_proxies):
+        for hop in reversed(forwarded_for.split(',')):
+            address = hop.strip()
+            if not _is_trusted_proxy(_parse_ip(address), trusted_proxies):
+                break
+    return address
+
+
+def is_remote_address(remote_addr, forwarded_for=None, trusted_proxies=()):
+    """외부(터널/인터넷) 접속인지 판단합니다. 신뢰하는 프록시가 전달한 원래 주소를 우선 사용합니다."""
+    ip = _parse_ip(client_address(remote_addr, forwarded_for, trusted_proxies))
+    if ip is None:
+        return True
+    return not (ip.is_private or ip.is_loopback or ip.is_link_local)
+
+
+class AdaptiveQualityController:
+    """시청자별 수신 확인(ack) 지연을 측정해 해상도/화질/프레임 속도를 조절합니다.
+
+    평균 지연이 목표를 넘거나 수신 확인이 시간 초과되면 한 단계 낮추고,
+    목표의 절반 이하로 안정적으로 유지되면 한 단계 올립니다.
+    """
+
+    def __init__(self, target_latency=0.3, remote=False, evaluate_interval=1.0, upgrade_windows=3):
+        self.target_latency = target_latency
+        self.remote = remote
+        self.evaluate_interval = evaluate_interval
+        self.upgrade_windows = upgrade_windows
+        # LAN 시청자는 최고 화질, 외부 시청자는 저대역 단계에서 시작
+        self.level = 2 if remote else 0
+        self.avg_latency = None
+        self._timeouts = 0
+        self._good_windows = 0
+        self._last_evaluate = time.time()
+        self._lock = threading.Lock()
+
+    def record_delivery(self, latency):
+        """프레임 전송부터 수신 확인까지 걸린 시간을 기록합니다."""
+        with self._lock:
+            if self.avg_latency is None:
+                self.avg_latency = latency
+            else:
+                self.avg_latency = self.avg_latency * 0.8 + latency * 0.2
+            self._maybe_evaluate()
+
+    def record_timeout(self):
+        """수신 확인이 시간 내에 오지 않았음을 기록합니다."""
+        with self._lock:
+            self._timeouts += 1
+            self._maybe_evaluate()
+
+    def _maybe_evaluate(self):
+        now = time.time()
+        if now - self._last_evaluate < self.evaluate_interval:
+            return
+        self._last_evaluate = now
+
+        latency = self.avg_latency or 0.0
+        if self._timeouts or latency > self.target_latency * 1.5:
+            # 지연 초과: 한 단계 낮춤
+            self.level = min(self.level + 1, len(QUALITY_LEVELS) - 1)
+            self._good_windows = 0
+        elif latency < self.target_latency * 0.5:
+            # 여유 있음: 연속으로 안정적이면 한 단계 올림
+            self._good_windows += 1
+            if self._good_windows >= self.upgrade_windows:
+                self.level = max(self.level - 1, 0)
+                self._good_windows = 0
+        else:
+            self._good_windows = 0
+        self._timeouts = 0
+
+    def frame_interval(self):
+        """현재 단계의 최소 프레임 간격(초)"""
+        return 1.0 / QUALITY_LEVELS[self.level][3]
+
+    def get_stats(self):
+        width, height, quality, fps = QUALITY_LEVELS[self.level]
+        return {
+            'level': self.level,
+            'resolution': f"{width}x{height}",
+            'jpeg_quality': quality,
+            'max_fps': fps,
+            'avg_latency_ms': round((self.avg_latency or 0.0) * 1000, 1),
+            'remote': self.remote,
+        }
@@ -31,10 +31,34 @@ def create_backup():
         'smart_home_cam_yolov5.py',
         'camera_fix.py',
         'check_cameras.py',
+        'check_memory.py',
+        'check_fcm.py',
+        'benchmark_int8.py',
+        
+        # 스트리밍/추론 모듈들
+        'frame_pipeline.py',
+        'frame_grabber.py',
+        'frame_ring.py',
+        'detections.py',
+        'stream_broadcaster.py',
+        'adaptive_quality.py',
+        'motion_gate.py',
+        'preroll_buffer.py',
+        'event_recorder.py',
+        'video_writers.py',
+        'storage_manager.py',
+        'notification_dispatcher.py',
+        'incident_aggregator.py',
+        'thumbnail_cache.py',
+        'inference_backends.py',
+        'inference_server.py',
+        'inference_process.py',
+        'quantization.py',
         
         # Firebase 관련 파일들
         'firebase_fcm.py',
         'firebase_config.py',
+        'token_store.py',
         'sonavi-home-cctv-bf6e3-firebase-adminsdk-fbsvc-b5de10f65b.json',
         
         # 웹 템플릿 파일들
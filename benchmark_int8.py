@@ -0,0 +1,147 @@
+import argparse
+import time
+
+import numpy as np
+
+from inference_backends import MODEL_PATHS, OnnxRuntimeBackend, TorchBackend, export_model
+from quantization import EVALUATION_PART, load_calibration_frames, quantize_model
+
+
+def box_iou(box, boxes):
+    """박스 하나와 여러 박스 사이의 IoU (xyxy 형식)"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def average_precision(recall, precision):
+    """COCO 방식 101점 보간 AP"""
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    points = np.linspace(0, 1, 101)
+    return float(np.mean(np.interp(points, recall, precision)))
+
+
+def mean_average_precision(predictions, references, iou_threshold):
+    """FP32 결과를 기준(정답)으로 삼아 비교 대상 결과의 mAP를 계산합니다.
+
+    predictions/references: 프레임별 (N, 6) [x1, y1, x2, y2, conf, cls] 배열 목록
+    """
+    classes = set()
+    for reference in references:
+        classes.update(reference[:, 5].astype(int).tolist())
+
+    aps = []
+    for class_id in sorted(classes):
+        scores, matches = [], []
+        total_references = 0
+        for prediction, reference in zip(predictions, references):
+            ref_boxes = reference[reference[:, 5] == class_id, :4]
+            total_references += len(ref_boxes)
+            pred = prediction[prediction[:, 5] == class_id]
+            pred = pred[np.argsort(-pred[:, 4])]
+            used = np.zeros(len(ref_boxes), dtype=bool)
+            for row in pred:
+                scores.append(row[4])
+                if len(ref_boxes) == 0:
+                    matches.append(0)
+                    continue
+                ious = box_iou(row[:4], ref_boxes)
+                ious[used] = 0
+                best = int(np.argmax(ious))
+                if ious[best] >= iou_threshold:
+                    used[best] = True
+                    matches.append(1)
+                else:
+                    matches.append(0)
+
+        if total_references == 0:
+            continue
+        if not scores:
+            aps.append(0.0)
+            continue
+        order = np.argsort(-np.asarray(scores))
+        hits = np.asarray(matches)[order]
+        true_positives = np.cumsum(hits)
+        false_positives = np.cumsum(1 - hits)
+        recall = true_positives / total_references
+        precision = true_positives / np.maximum(true_positives + false_positives, 1e-9)
+        aps.append(average_precision(recall, precision))
+
+    return float(np.mean(aps)) if aps else 0.0
+
+
+def run_backend(backend, frames, conf, warmup=5):
+    """프레임별 추론 결과와 지연 시간(ms)을 측정합니다."""
+    for frame in frames[:warmup]:
+        backend.predict([frame], conf)
+
+    outputs, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        outputs.append(backend.predict([frame], conf)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, np.asarray(latencies)
+
+
+def print_report(rows):
+    print()
+    print(f"{'엔진':<14}{'평균(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'mAP@.5':>10}{'mAP@.5:.95':>12}")
+    print("-" * 66)
+    for name, latencies, map50, map50_95 in rows:
+        print(f"{name:<14}{latencies.mean():>10.1f}{np.percentile(latencies, 50):>10.1f}"
+              f"{np.percentile(latencies, 95):>10.1f}{map50:>10.3f}{map50_95:>12.3f}")
+    print()
+    print("※ mAP는 FP32 ONNX 모델의 결과를 기준으로 한 값입니다 (1.0 = 차이 없음).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 양자화 모델의 정확도/지연 시간 비교")
+    parser.add_argument('--model-type', default='nano', choices=sorted(MODEL_PATHS.keys()))
+    parser.add_argument('--dirs', nargs='+', default=['recordings', 'snapshots'],
+                        help="보정/평가용 프레임을 가져올 폴더")
+    parser.add_argument('--calibration-frames', type=int, default=200)
+    parser.add_argument('--eval-frames', type=int, default=200)
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--torch', action='store_true', help="PyTorch 엔진도 함께 측정")
+    parser.add_argument('--requantize', action='store_true', help="캐시된 INT8 모델을 무시하고 다시 양자화")
+    args = parser.parse_args()
+
+    print("=" * 66)
+    print(f"INT8 양자화 비교 - YOLOv5 {args.model_type}")
+    print("=" * 66)
+
+    model_path = MODEL_PATHS[args.model_type]
+    fp32_path = export_model(model_path, 'onnx')
+    int8_path = quantize_model(fp32_path, args.dirs, args.calibration_frames, force=args.requantize)
+
+    # 보정에 쓰지 않은 프레임으로 평가 (프레임마다 정해진 보정/평가 구분 중 평가 쪽에서 추출)
+    frames = load_calibration_frames(args.dirs, args.eval_frames, part=EVALUATION_PART)
+    if not frames:
+        raise SystemExit(f"평가용 프레임이 없습니다: {args.dirs}")
+    print(f"평가 프레임: {len(frames)}개")
+
+    threads = args.threads or None
+    fp32_outputs, fp32_latencies = run_backend(OnnxRuntimeBackend(fp32_path, threads), frames, args.conf)
+    rows = [('onnx-fp32', fp32_latencies, 1.0, 1.0)]
+
+    int8_outputs, int8_latencies = run_backend(OnnxRuntimeBackend(int8_path, threads), frames, args.conf)
+    iou_thresholds = np.linspace(0.5, 0.95, 10)
+    rows.append(('onnx-int8', int8_latencies,
+                 mean_average_precision(int8_outputs, fp32_outputs, 0.5),
+                 float(np.mean([mean_average_precision(int8_outputs, fp32_outputs, t) for t in iou_thresholds]))))
+
+    if args.torch:
+        torch_outputs, torch_latencies = run_backend(TorchBackend(model_path, threads), frames, args.conf)
+        rows.append(('torch-fp32', torch_latencies,
+                     mean_average_precision(torch_outputs, fp32_outputs, 0.5),
+                     float(np.mean([mean_average_precision(torch_outputs, fp32_outputs, t) for t in iou_thresholds]))))
+
+    print_report(rows)
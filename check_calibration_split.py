@@ -0,0 +1,110 @@
+import argparse
+import os
+import tempfile
+
+import quantization
+from quantization import CALIBRATION_PART, EVALUATION_PART, load_calibration_frames, select_video_frames
+
+
+class FakeCV2:
+    """quantization 모듈의 cv2 대용 - 실제 디코딩 대신 '경로#프레임 번호' 문자열을 프레임으로 돌려줌"""
+
+    CAP_PROP_FRAME_COUNT = 7
+    CAP_PROP_POS_FRAMES = 1
+
+    def __init__(self, video_frames):
+        self.video_frames = video_frames
+
+    def imread(self, path):
+        return f"{os.path.normpath(path)}#0"
+
+    def VideoCapture(self, path):
+        return FakeCapture(path, self.video_frames)
+
+
+class FakeCapture:
+    def __init__(self, path, total):
+        self.path = os.path.normpath(path)
+        self.total = total
+        self.position = 0
+
+    def get(self, prop):
+        return self.total if prop == FakeCV2.CAP_PROP_FRAME_COUNT else self.position
+
+    def set(self, prop, value):
+        self.position = int(value)
+
+    def read(self):
+        return True, f"{self.path}#{self.position}"
+
+    def release(self):
+        pass
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"  ✅ {message}")
+
+
+def make_files(directory, images, videos):
+    """빈 스냅샷/영상 파일을 만듭니다. (내용은 FakeCV2가 대신 만들어 줌)"""
+    for index in range(images):
+        open(os.path.join(directory, f"snapshot_{index:03d}.jpg"), 'wb').close()
+    for index in range(videos):
+        open(os.path.join(directory, f"recording_{index:03d}.mp4"), 'wb').close()
+
+
+def check_index_split(totals, counts):
+    print("\n[1] 영상 프레임 번호 분할 - 보정/평가 추출 수가 달라도 겹치지 않음")
+    for total in totals:
+        path = f"recordings/recording_{total}.mp4"
+        for calibration_count in counts:
+            for evaluation_count in counts:
+                calibration = set(select_video_frames(path, total, CALIBRATION_PART, calibration_count))
+                evaluation = set(select_video_frames(path, total, EVALUATION_PART, evaluation_count))
+                if calibration & evaluation:
+                    raise AssertionError(f"프레임 {total}개, 추출 {calibration_count}/{evaluation_count}개에서 "
+                                         f"겹치는 프레임 {sorted(calibration & evaluation)[:5]}")
+    check(True, f"영상 길이 {len(totals)}종 x 추출 수 {len(counts)}x{len(counts)}조합에서 겹치는 프레임 없음")
+
+
+def check_loaded_split(images, videos, video_frames, calibration_frames, evaluation_frames):
+    print(f"\n[2] 스냅샷 {images}개 + 영상 {videos}개({video_frames}프레임) - "
+          f"보정 {calibration_frames}개 / 평가 {evaluation_frames}개")
+    original = quantization.cv2
+    quantization.cv2 = FakeCV2(video_frames)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            make_files(directory, images, videos)
+            calibration = load_calibration_frames([directory], calibration_frames, part=CALIBRATION_PART)
+            evaluation = load_calibration_frames([directory], evaluation_frames, part=EVALUATION_PART)
+    finally:
+        quantization.cv2 = original
+
+    check(len(calibration) == len(set(calibration)) and len(evaluation) == len(set(evaluation)),
+          f"각 집합 안에 중복 프레임 없음 (보정 {len(calibration)}개, 평가 {len(evaluation)}개)")
+    check(0 < len(calibration) <= calibration_frames and 0 < len(evaluation) <= evaluation_frames,
+          "요청한 개수 이내로 추출")
+    overlap = set(calibration) & set(evaluation)
+    check(not overlap, f"보정/평가 프레임이 겹치지 않음 (겹침 {len(overlap)}개)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 보정용/평가용 프레임이 겹치지 않는지 확인")
+    parser.add_argument('--video-frames', type=int, default=900, help="가상 영상 한 개의 프레임 수")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("보정/평가 프레임 분할 확인")
+    print("=" * 50)
+    try:
+        check_index_split(totals=[1, 2, 7, 100, 301, args.video_frames], counts=[1, 3, 50, 100, 200])
+        # 보정 200 / 평가 100, 스냅샷 수가 홀수인 경우 등 추출 간격이 달라지는 조합
+        for images, videos, calibration_frames, evaluation_frames in [(0, 2, 200, 100), (7, 3, 200, 100),
+                                                                       (51, 1, 100, 200), (301, 4, 200, 200)]:
+            check_loaded_split(images, videos, args.video_frames, calibration_frames, evaluation_frames)
+    except AssertionError as e:
+        print(f"  ❌ {e}")
+        raise SystemExit(1)
+    print("\n✅ 모든 확인을 통과했습니다.")
@@ -0,0 +1,154 @@
+import argparse
+import os
+import tempfile
+
+from firebase_admin import exceptions, messaging
+
+from firebase_fcm import MULTICAST_LIMIT, FirebaseFCM
+
+
+class FakeMulticast:
+    """messaging.send_each_for_multicast 대용 - 실제 FCM 서버 대신 토큰별 결과를 정해서 돌려줌
+
+    토큰 이름이 'unregistered-'로 시작하면 UNREGISTERED, 'invalid-'로 시작하면
+    INVALID_ARGUMENT 오류를 돌려주고 나머지는 성공으로 처리합니다.
+    fail_requests가 참이면 묶음 요청 자체가 실패합니다. (서버 일시 장애)
+    """
+
+    def __init__(self, fail_requests=False):
+        self.fail_requests = fail_requests
+        self.batch_sizes = []
+        self.dry_runs = []
+
+    def __call__(self, message, dry_run=False, app=None):
+        self.batch_sizes.append(len(message.tokens))
+        self.dry_runs.append(dry_run)
+        if self.fail_requests:
+            raise exceptions.UnavailableError("가상 FCM 서버 일시 장애")
+        responses = []
+        for index, token in enumerate(message.tokens):
+            if token.startswith('unregistered-'):
+                responses.append(messaging.SendResponse(None, messaging.UnregisteredError("등록되지 않은 토큰")))
+            elif token.startswith('invalid-'):
+                responses.append(messaging.SendResponse(None, exceptions.InvalidArgumentError("잘못된 인자")))
+            else:
+                responses.append(messaging.SendResponse({'name': f"projects/test/messages/{index}"}, None))
+        return messaging.BatchResponse(responses)
+
+
+def make_tokens(count):
+    """성공/UNREGISTERED/INVALID_ARGUMENT가 섞인 토큰 목록 (FCM 토큰 길이 검사를 통과하도록 길게 만듦)"""
+    tokens = []
+    for index in range(count):
+        if index % 5 == 0:
+            prefix = 'unregistered-'
+        elif index % 7 == 0:
+            prefix = 'invalid-'
+        else:
+            prefix = 'ok-'
+        tokens.append(f"{prefix}{index:05d}-" + 'x' * 60)
+    return tokens
+
+
+def make_fcm(directory, tokens):
+    fcm = FirebaseFCM(tokens_db=os.path.join(directory, 'fcm_tokens.db'), tokens_file=None)
+    fcm.app = object()  # 초기화된 앱 대용 (가짜 전송 함수는 앱을 사용하지 않음)
+    for token in tokens:
+        fcm.token_store.add(token)
+    fcm.load_tokens()
+    return fcm
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"  ✅ {message}")
+
+
+def check_mixed_results(directory, count):
+    print(f"\n[1] 토큰 {count}개 - 성공/UNREGISTERED/INVALID_ARGUMENT 혼합")
+    tokens = make_tokens(count)
+    unregistered = {token for token in tokens if token.startswith('unregistered-')}
+    invalid = {token for token in tokens if token.startswith('invalid-')}
+    ok = set(tokens) - unregistered - invalid
+
+    fcm = make_fcm(directory, tokens)
+    fake = FakeMulticast()
+    messaging.send_each_for_multicast = fake
+
+    result = fcm.send_notification("테스트", "가상 FCM 전송", raise_errors=True, use_cooldown=False)
+    expected_batches = -(-count // MULTICAST_LIMIT)
+
+    check(result is True, "한 기기 이상 전달되면 True 반환")
+    check(len(fake.batch_sizes) == expected_batches,
+          f"요청 {len(fake.batch_sizes)}번 (묶음 {MULTICAST_LIMIT}개 기준 {expected_batches}번)")
+    check(max(fake.batch_sizes) <= MULTICAST_LIMIT and sum(fake.batch_sizes) == count,
+          f"묶음 크기 {fake.batch_sizes} - 모든 토큰을 한 번씩 전송")
+    check(fcm.device_tokens == ok | invalid, f"UNREGISTERED 토큰 {len(unregistered)}개만 메모리에서 제거")
+    check(set(fcm.token_store.tokens()) == ok | invalid, "저장소에서도 같은 토큰만 제거")
+
+    failures = {device['token']: device['failures'] for device in fcm.token_store.metadata()}
+    check(all(failures[token] == 1 for token in invalid),
+          f"INVALID_ARGUMENT 토큰 {len(invalid)}개는 유지하고 실패 1회 기록")
+    check(all(failures[token] == 0 for token in ok), f"성공한 토큰 {len(ok)}개는 실패 횟수 0")
+
+    def build_message(batch):
+        return messaging.MulticastMessage(tokens=batch, notification=messaging.Notification(title="t", body="b"))
+
+    succeeded, pruned, failed, transient = fcm._send_multicast(make_tokens(count), build_message)
+    counts = (len(succeeded), len(pruned), len(failed), len(transient))
+    check(counts == (len(ok), len(unregistered), len(invalid), 0),
+          f"_send_multicast 반환 개수: 성공 {len(succeeded)}, 무효 {len(pruned)}, 실패 {len(failed)}, 일시적 오류 0")
+    fcm.token_store.close()
+
+
+def check_transient_failure(directory, count):
+    print(f"\n[2] 토큰 {count}개 - 묶음 요청 자체가 실패 (일시 장애)")
+    tokens = [token for token in make_tokens(count) if token.startswith('ok-')]
+    fcm = make_fcm(directory, tokens)
+    messaging.send_each_for_multicast = FakeMulticast(fail_requests=True)
+
+    check(fcm.send_notification("테스트", "장애", use_cooldown=False) is False, "raise_errors=False이면 False 반환")
+    try:
+        fcm.send_notification("테스트", "장애", raise_errors=True, use_cooldown=False)
+        raised = False
+    except exceptions.UnavailableError:
+        raised = True
+    check(raised, "raise_errors=True이면 UnavailableError를 던져 알림 작업자가 재시도")
+    check(len(fcm.device_tokens) == len(tokens), "일시 장애로는 토큰을 제거하지 않음")
+    fcm.token_store.close()
+
+
+def check_dry_run_cleanup(directory, count):
+    print(f"\n[3] 토큰 {count}개 - 시작 시 dry_run 토큰 정리")
+    tokens = make_tokens(count)
+    fcm = make_fcm(directory, tokens)
+    fake = FakeMulticast()
+    messaging.send_each_for_multicast = fake
+
+    fcm.cleanup_tokens_except_local()
+    check(all(fake.dry_runs), "모든 묶음을 dry_run으로 전송")
+    check(not any(token.startswith('unregistered-') for token in fcm.device_tokens), "UNREGISTERED 토큰 제거")
+    check(any(token.startswith('invalid-') for token in fcm.device_tokens), "INVALID_ARGUMENT 토큰은 유지")
+    fcm.token_store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가상 FCM 응답으로 멀티캐스트 전송과 무효 토큰 정리 확인")
+    parser.add_argument('--tokens', type=int, default=1203, help=f"등록할 토큰 수 ({MULTICAST_LIMIT}개보다 많게)")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("FCM 멀티캐스트 전송 확인 (가상 FCM)")
+    print("=" * 50)
+    original = messaging.send_each_for_multicast
+    try:
+        for check_function in (check_mixed_results, check_transient_failure, check_dry_run_cleanup):
+            with tempfile.TemporaryDirectory() as directory:
+                check_function(directory, args.tokens)
+    except AssertionError as e:
+        print(f"  ❌ {e}")
+        raise SystemExit(1)
+    finally:
+        messaging.send_each_for_multicast = original
+    print("\n✅ 모든 확인을 통과했습니다.")
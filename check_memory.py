@@ -0,0 +1,177 @@
+import argparse
+import gc
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from event_recorder import EventRecorder
+from frame_grabber import FrameGrabber
+from inference_backends import InferenceBackend
+from motion_gate import MotionGate
+from preroll_buffer import PreRollBuffer
+from smart_home_cam_yolov5 import SmartHomeCam
+
+
+class SyntheticCapture:
+    """카메라 대신 움직이는 사각형이 그려진 프레임을 만들어내는 cv2.VideoCapture 대용"""
+
+    def __init__(self, width=640, height=480, fps=30):
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps
+        self.index = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, image=None):
+        time.sleep(self.interval)
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        image[:] = 40
+        x = (self.index * 7) % (self.width - 80)
+        cv2.rectangle(image, (x, 200), (x + 80, 280), (0, 200, 255), -1)
+        self.index += 1
+        return True, image
+
+    def release(self):
+        self.opened = False
+
+
+class FixedBackend(InferenceBackend):
+    """모델 없이 고정된 감지 결과를 돌려주는 추론 엔진 (프레임 처리 경로만 측정할 때 사용)"""
+
+    name = 'fixed'
+
+    def __init__(self):
+        super().__init__()
+        self.names = {0: 'person', 15: 'cat'}
+        self.output = np.array([[100, 120, 220, 400, 0.9, 0],
+                                [300, 260, 380, 330, 0.8, 15]], dtype=np.float32)
+
+    def predict(self, images, conf, imgsz=640):
+        return [self.output.copy() for _ in images]
+
+
+def run_check(duration, warmup, with_model, model_type, threshold_kb, clip_seconds):
+    print(f"프레임 루프 워밍업 {warmup}초, 측정 {duration}초 (gc.collect() 호출 없음)")
+    recordings = tempfile.TemporaryDirectory(prefix='memory-check-')
+
+    cam = SmartHomeCam(camera_id=0, model_type=model_type)
+    cam.cap = SyntheticCapture()
+    cam.grabber = FrameGrabber(cam.cap, cam.frame_ring)
+    cam.grabber.start()
+    cam.camera_initialized = True
+    cam.detection_interval = 0  # 매 프레임 감지 (최악의 경우)
+    cam.special_objects = ['person']  # 고정 감지 결과의 person으로 이벤트 녹화를 계속 트리거
+    cam.incidents.on_alert = lambda incident: None  # 사건 집계는 수행하되 알림 전송 제외
+
+    # 실제 운영과 같이 움직임 게이트, 사전 녹화 버퍼, 이벤트 녹화기를 모두 켜고 측정
+    # (클립을 clip_seconds초마다 닫고 새로 열어 세그먼트 작성기 생성/해제까지 반복)
+    cam.motion_gate = MotionGate()
+    cam.preroll = PreRollBuffer()
+    cam.event_recorder = EventRecorder(recordings.name, preroll=cam.preroll,
+                                       max_clip_seconds=clip_seconds,
+                                       writer_settings={'encoder': 'opencv'},
+                                       queue_size=cam.event_queue_frames,
+                                       segment_seconds=clip_seconds / 2,
+                                       camera=cam.name)
+    cam.preroll.start()
+    cam.event_recorder.start()
+
+    if with_model:
+        if not cam.load_yolo_model():
+            raise SystemExit("모델을 로드할 수 없습니다.")
+    else:
+        cam.model = FixedBackend()
+        cam.classes = cam.model.names
+        cam._build_class_tables()
+
+    # 가상 시청자: 인코딩/전송 경로까지 포함해서 측정
+    viewer = cam.broadcaster.add_client('memory-check', push=False)
+
+    def drain():
+        while viewer.active:
+            frame = viewer.get(timeout=0.5)
+            if frame is not None:
+                frame.jpeg()
+
+    threading.Thread(target=drain, daemon=True).start()
+    threading.Thread(target=cam.process_frame, daemon=True).start()
+
+    # 전체 GC가 일어나면 기록 (강제 GC 없이도 2세대 수집이 반복되는지 확인)
+    collections = {0: 0, 1: 0, 2: 0}
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections[info['generation']] += 1
+
+    tracemalloc.start()
+    time.sleep(warmup)
+    gc.callbacks.append(on_gc)
+    start_frames = cam.last_frame_seq
+    baseline = tracemalloc.take_snapshot()
+    start_current, _ = tracemalloc.get_traced_memory()
+
+    samples = []
+    end_time = time.time() + duration
+    while time.time() < end_time:
+        time.sleep(1.0)
+        samples.append(tracemalloc.get_traced_memory()[0])
+
+    final = tracemalloc.take_snapshot()
+    gc.callbacks.remove(on_gc)
+    frames = cam.last_frame_seq - start_frames
+    cam.running = False
+    viewer.active = False
+    cam.grabber.stop()
+    cam.preroll.stop()
+    cam.event_recorder.stop()
+    tracemalloc.stop()
+    recordings.cleanup()
+
+    growth_kb = (samples[-1] - start_current) / 1024 if samples else 0.0
+    print()
+    print(f"처리 프레임: {frames}개 ({frames / duration:.1f} fps)")
+    print(f"추적 메모리: 시작 {start_current / 1024:.0f}KB → 종료 {samples[-1] / 1024:.0f}KB "
+          f"(최대 {max(samples) / 1024:.0f}KB, 증가 {growth_kb:+.0f}KB)")
+    print(f"GC 수집 횟수: 0세대 {collections[0]}, 1세대 {collections[1]}, 2세대 {collections[2]}")
+    print(f"링 버퍼: {cam.frame_ring.get_stats()}")
+    print(f"움직임 게이트: {cam.motion_gate.get_stats()}")
+    print(f"사전 녹화 버퍼: {cam.preroll.get_stats()}")
+    print(f"이벤트 녹화기: {cam.event_recorder.get_stats()}")
+
+    print()
+    print("메모리 증가 상위 항목:")
+    for stat in final.compare_to(baseline, 'lineno')[:10]:
+        print(f"  {stat}")
+
+    print()
+    if growth_kb > threshold_kb:
+        print(f"❌ 측정 구간 동안 메모리가 {growth_kb:.0f}KB 증가했습니다. (허용 {threshold_kb}KB)")
+        return False
+    print(f"✅ 메모리 사용량이 일정합니다. (증가 {growth_kb:+.0f}KB, 허용 {threshold_kb}KB)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="프레임 처리 루프의 메모리 안정성 확인 (tracemalloc)")
+    parser.add_argument('--duration', type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument('--warmup', type=float, default=5.0, help="버퍼 할당이 끝나길 기다리는 시간 (초)")
+    parser.add_argument('--with-model', action='store_true', help="실제 YOLO 모델로 감지 (기본: 고정 결과)")
+    parser.add_argument('--model-type', default='nano')
+    parser.add_argument('--threshold-kb', type=int, default=512, help="허용할 메모리 증가량 (KB)")
+    parser.add_argument('--clip-seconds', type=float, default=10.0, help="이벤트 클립 최대 길이 (초)")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("프레임 루프 메모리 확인")
+    print("=" * 50)
+    ok = run_check(args.duration, args.warmup, args.with_model, args.model_type, args.threshold_kb,
+                   args.clip_seconds)
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,79 @@
+import numpy as np
+
+_EMPTY_BOXES = np.zeros((0, 4), dtype=np.int32)
+_EMPTY_CONFIDENCES = np.zeros(0, dtype=np.float32)
+_EMPTY_CLASS_IDS = np.zeros(0, dtype=np.int32)
+
+
+class Detections:
+    """배열 기반 객체 감지 결과
+
+    박스/신뢰도/클래스 ID를 numpy 배열로 한 번에 보관하고, 순회 시에는 기존 코드와
+    호환되는 (label, confidence, (x, y, w, h)) 튜플을 돌려줍니다.
+    """
+
+    __slots__ = ('boxes', 'confidences', 'class_ids', 'names')
+
+    def __init__(self, boxes, confidences, class_ids, names):
+        self.boxes = boxes  # (N, 4) int32, x/y/w/h
+        self.confidences = confidences  # (N,) float32
+        self.class_ids = class_ids  # (N,) int32
+        self.names = names  # 클래스 ID → 이름 (dict 또는 list)
+
+    @classmethod
+    def empty(cls, names=None):
+        # 길이 0 배열은 수정되지 않으므로 모든 빈 결과가 공유
+        return cls(_EMPTY_BOXES, _EMPTY_CONFIDENCES, _EMPTY_CLASS_IDS, names or {})
+
+    @classmethod
+    def from_array(cls, data, names):
+        """(N, 6) [x1, y1, x2, y2, conf, cls] 배열에서 감지 결과를 만듭니다.
+
+        추적 ID 열이 포함된 (N, 7) 배열도 마지막 두 열을 신뢰도/클래스로 사용합니다.
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if data.size == 0:
+            return cls.empty(names)
+        # x1, y1, x2, y2 → x, y, w, h (제자리 변환)
+        boxes = data[:, :4].astype(np.int32)
+        boxes[:, 2:] -= boxes[:, :2]
+        return cls(boxes, data[:, -2], data[:, -1].astype(np.int32), names)
+
+    @classmethod
+    def concatenate(cls, items, names):
+        items = [item for item in items if len(item)]
+        if not items:
+            return cls.empty(names)
+        return cls(np.concatenate([item.boxes for item in items]),
+                   np.concatenate([item.confidences for item in items]),
+                   np.concatenate([item.class_ids for item in items]),
+                   names)
+
+    def select(self, keep):
+        """불리언 마스크 또는 인덱스 배열로 일부 감지 결과만 골라냅니다."""
+        return Detections(self.boxes[keep], self.confidences[keep], self.class_ids[keep], self.names)
+
+    def centers(self):
+        """각 박스의 중심 좌표 (N, 2)"""
+        return self.boxes[:, :2] + self.boxes[:, 2:] // 2
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __bool__(self):
+        return len(self.class_ids) > 0
+
+    def __iter__(self):
+        names = self.names
+        for (x, y, w, h), confidence, class_id in zip(self.boxes.tolist(),
+                                                      self.confidences.tolist(),
+                                                      self.class_ids.tolist()):
+            yield names[class_id], confidence, (x, y, w, h)
+
+    def labels(self):
+        return [self.names[class_id] for class_id in self.class_ids.tolist()]
+
+    def to_info(self):
+        """웹 전송용 감지 정보 목록을 반환합니다."""
+        return [{"label": label, "confidence": confidence}
+                for label, confidence in zip(self.labels(), self.confidences.tolist())]
@@ -0,0 +1,188 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from preroll_buffer import write_encoded_frames
+from video_writers import SegmentedClipWriter
+
+
+class EventClip:
+    """진행 중인 이벤트 클립 한 개의 상태"""
+
+    def __init__(self, filename, started_at, preroll_frames, labels):
+        self.filename = filename
+        self.started_at = started_at
+        self.preroll_frames = preroll_frames
+        self.labels = set(labels)
+        self.end_time = started_at
+        self.triggers = 1
+        self.frames = 0
+
+
+class EventRecorder:
+    """감시 대상 객체가 나타나면 자동으로 클립을 녹화하는 이벤트 녹화기
+
+    trigger()가 호출되면 사전 녹화 버퍼의 장면부터 클립을 시작하고, 마지막 트리거
+    이후 post_roll 초가 지나면 클립을 닫습니다. 클립이 열려 있는 동안 들어온 트리거는
+    종료 시각만 늦추므로 겹치는 이벤트는 하나의 파일로 합쳐집니다. 파일 기록은
+    전용 작성 스레드에서 수행하며, 캡처 루프는 링 버퍼 슬롯 참조만 넘깁니다.
+    """
+
+    def __init__(self, directory, preroll=None, post_roll=20.0, max_clip_seconds=300.0,
+                 writer_settings=None, queue_size=4, file_tag='', segment_seconds=60.0, storage=None,
+                 camera=''):
+        self.directory = directory
+        self.preroll = preroll
+        self.post_roll = post_roll
+        self.max_clip_seconds = max_clip_seconds
+        self.writer_settings = writer_settings or {}  # 작성기 설정 (encoder, preset, crf, fps)
+        self.file_tag = file_tag
+        self.segment_seconds = segment_seconds
+        self.storage = storage  # 세그먼트 색인/보관 정책 (StorageManager)
+        self.camera = camera
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.clip = None
+        self.clips_written = 0
+        self.last_clip = None
+        self._lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, directory, settings, preroll=None, queue_size=4, file_tag='', segment_seconds=60.0,
+                    storage=None, camera='', min_post_roll=0.0):
+        """설정으로 녹화기를 만듭니다.
+
+        움직임 게이트를 쓰면 가만히 있는 객체는 forced_refresh 초마다 한 번만 다시
+        감지되므로, post_roll이 그보다 짧으면 한 이벤트가 여러 클립으로 나뉩니다.
+        min_post_roll로 post_roll의 하한을 지정합니다.
+        """
+        post_roll = settings.get('post_roll_seconds', 20.0)
+        if post_roll < min_post_roll:
+            print(f"⚠️ post_roll_seconds({post_roll}초)가 움직임 게이트 강제 추론 주기보다 짧아 "
+                  f"{min_post_roll:.1f}초로 늘립니다.")
+            post_roll = min_post_roll
+        return cls(directory, preroll=preroll,
+                   post_roll=post_roll,
+                   max_clip_seconds=settings.get('max_clip_seconds', 300.0),
+                   writer_settings=settings,
+                   queue_size=queue_size,
+                   file_tag=file_tag,
+                   segment_seconds=segment_seconds,
+                   storage=storage,
+                   camera=camera)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="event-recorder")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        """진행 중인 클립을 마무리하고 작성 스레드를 멈춥니다."""
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+
+    @property
+    def active(self):
+        return self.clip is not None
+
+    def trigger(self, labels, timestamp=None):
+        """감시 대상이 감지되었음을 알립니다. 클립이 없으면 새로 열고, 있으면 종료 시각을 늦춥니다."""
+        if not self.running:
+            return
+        timestamp = timestamp or time.time()
+        with self._lock:
+            if self.clip is None:
+                name = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S")
+                filename = os.path.join(self.directory, f"event{self.file_tag}_{name}.mp4")
+                preroll_frames = self.preroll.snapshot(timestamp) if self.preroll is not None else []
+                self.clip = EventClip(filename, timestamp, preroll_frames, labels)
+                print(f"이벤트 녹화 시작: {filename} ({', '.join(sorted(labels))})")
+            else:
+                self.clip.labels.update(labels)
+                self.clip.triggers += 1
+            self.clip.end_time = timestamp + self.post_roll
+
+    def push(self, ref, timestamp):
+        """클립이 열려 있으면 프레임 슬롯 참조를 작성 대기열에 넣습니다. (가득 차면 오래된 프레임 버림)"""
+        if self.clip is None:
+            return
+        if self.frames.full():
+            try:
+                self.frames.get_nowait()[1].release()
+            except queue.Empty:
+                pass
+        self.frames.put((timestamp, ref.retain()))
+
+    def _should_close(self, clip, now):
+        return (not self.running or now >= clip.end_time
+                or now - clip.started_at >= self.max_clip_seconds)
+
+    def _run(self):
+        writer = None
+        clip = None
+        while self.running or clip is not None:
+            try:
+                timestamp, ref = self.frames.get(timeout=0.2)
+            except queue.Empty:
+                timestamp, ref = None, None
+
+            try:
+                with self._lock:
+                    clip = self.clip
+                if clip is not None and ref is not None:
+                    if writer is None:
+                        # 첫 프레임 크기로 작성기를 만들고 사전 녹화 장면부터 기록
+                        frame_size = (ref.array.shape[1], ref.array.shape[0])
+                        writer = SegmentedClipWriter(clip.filename, frame_size, self.writer_settings,
+                                                     self.segment_seconds, self.storage, 'event', self.camera)
+                        write_encoded_frames(writer, clip.preroll_frames)
+                        clip.preroll_frames = None
+                    writer.write(ref.array, timestamp)
+                    clip.frames += 1
+            except Exception as e:
+                print(f"이벤트 녹화 프레임 쓰기 중 오류: {e}")
+            finally:
+                if ref is not None:
+                    ref.release()
+
+            if clip is None:
+                continue
+            with self._lock:
+                # 그 사이 들어온 트리거로 종료 시각이 늦춰졌을 수 있으므로 잠금 안에서 확인
+                closing = self._should_close(clip, timestamp or time.time())
+                if closing:
+                    self.clip = None
+            if closing:
+                if writer is not None:
+                    writer.close()
+                    self.clips_written += 1
+                    self.last_clip = writer.segments[0] if writer.segments else clip.filename
+                    print(f"이벤트 녹화 완료: {self.last_clip} ({time.time() - clip.started_at:.1f}초, "
+                          f"세그먼트 {len(writer.segments)}개, 트리거 {clip.triggers}회)")
+                    writer = None
+                clip = None
+
+        # 남은 프레임 슬롯 반납
+        while not self.frames.empty():
+            try:
+                self.frames.get_nowait()[1].release()
+            except queue.Empty:
+                break
+
+    def get_stats(self):
+        with self._lock:
+            clip = self.clip
+        return {
+            'recording': clip is not None,
+            'current_file': clip.filename if clip is not None else None,
+            'labels': sorted(clip.labels) if clip is not None else [],
+            'clips_written': self.clips_written,
+            'last_clip': self.last_clip,
+        }
@@ -1,70 +1,50 @@
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, exceptions, messaging
 import time
 from datetime import datetime
 import os
-import json
+import threading
+
+from token_store import TokenStore
+
+# send_each_for_multicast 한 번에 보낼 수 있는 최대 토큰 수
+MULTICAST_LIMIT = 500
+
+# 토큰 자체가 무효해서 다시 보내도 성공할 수 없는 오류 (토큰 제거 대상)
+INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+# 잠시 후 다시 보내면 성공할 수 있는 오류 (재시도 대상)
+TRANSIENT_ERRORS = (exceptions.UnavailableError, exceptions.InternalError,
+                    exceptions.DeadlineExceededError, messaging.QuotaExceededError)
+
 
 class FirebaseFCM:
-    def __init__(self):
+    def __init__(self, tokens_db="fcm_tokens.db", tokens_file="fcm_tokens.json"):
         self.app = None
         self.last_notification_time = 0
         self.cooldown_minutes = 5
-        self.device_tokens = set()  # 웹 브라우저 토큰들 저장
-        self.tokens_file = "fcm_tokens.json"  # 토큰 저장 파일
+        self.device_tokens = set()  # 웹 브라우저 토큰들 (저장소 내용의 메모리 사본)
+        self.tokens_file = tokens_file  # 이전 버전 토큰 파일 (처음 한 번 가져옴)
+        self.token_store = TokenStore(tokens_db, legacy_path=tokens_file)
+        self._tokens_lock = threading.Lock()
         self.load_tokens()  # 저장된 토큰 로드
         self.initialize_firebase()
         
     def load_tokens(self):
-        """저장된 토큰들을 파일에서 로드"""
+        """저장된 토큰들을 저장소에서 로드"""
         try:
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 데이터 구조가 올바른지 확인
-                    if isinstance(data, dict) and 'all' in data:
-                        # 'all' 키의 값이 리스트인지 확인
-                        if isinstance(data['all'], list):
-                            # 유효한 토큰만 필터링 (길이가 충분한 문자열)
-                            valid_tokens = [token for token in data['all'] if isinstance(token, str) and len(token) > 50]
-                            self.device_tokens = set(valid_tokens)
-                            print(f"✅ 저장된 FCM 토큰 로드 완료: {len(valid_tokens)}개 토큰")
-                        else:
-                            print("⚠️ 토큰 데이터 형식 오류 - 새로 시작")
-                            self.device_tokens = set()
-                    else:
-                        print("⚠️ 토큰 파일 형식 오류 - 새로 시작")
-                        self.device_tokens = set()
-                        
-                    if self.device_tokens:
-                        print(f"🔍 로드된 토큰 미리보기:")
-                        for i, token in enumerate(list(self.device_tokens)[:3]):
-                            print(f"   토큰 {i+1}: {token[:30]}...")
+            tokens = self.token_store.tokens()
+            with self._tokens_lock:
+                self.device_tokens = set(tokens)
+            print(f"✅ 저장된 FCM 토큰 로드 완료: {len(tokens)}개 토큰")
         except Exception as e:
             print(f"⚠️ 토큰 로드 중 오류 (새로 시작): {e}")
             self.device_tokens = set()
     
-    def save_tokens(self):
-        """토큰들을 파일에 저장"""
-        try:
-            # 기존 데이터 로드
-            data = {}
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            
-            # 현재 토큰들을 'all' 키에 저장 (도메인 구분 나중에 추가 가능)
-            data['all'] = list(self.device_tokens)
-            data['last_updated'] = datetime.now().isoformat()
-            
-            with open(self.tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 FCM 토큰 저장 완료: {len(self.device_tokens)}개 토큰")
-            
-        except Exception as e:
-            print(f"❌ 토큰 저장 중 오류: {e}")
+    def _token_snapshot(self):
+        """다른 스레드가 토큰을 추가/삭제해도 안전하게 순회할 수 있는 토큰 목록"""
+        with self._tokens_lock:
+            return list(self.device_tokens)
         
     def initialize_firebase(self):
         """Firebase Admin SDK 초기화"""
@@ -92,32 +72,40 @@ class FirebaseFCM:
             return False
         
     def add_device_token(self, token):
-        """웹 브라우저에서 받은 FCM 토큰 추가"""
-        # 토큰이 이미 존재하는지 확인
-        is_new_token = token not in self.device_tokens
-        
-        self.device_tokens.add(token)
+        """웹 브라우저에서 받은 FCM 토큰 추가 (이미 있으면 마지막 확인 시각만 갱신)"""
+        is_new_token = self.token_store.add(token)
+        with self._tokens_lock:
+            self.device_tokens.add(token)
         
         if is_new_token:
-            print(f"✅ 새 FCM 토큰 등록됨: {token[:30]}...")
-            # 파일에 저장
-            self.save_tokens()
+            print(f"✅ 새 FCM 토큰 등록됨 (총 {len(self.device_tokens)}개)")
         else:
-            print(f"🔄 기존 FCM 토큰 확인됨: {token[:30]}...")
+            print("🔄 기존 FCM 토큰 확인됨")
         
     def remove_device_token(self, token):
         """토큰 제거"""
-        if token in self.device_tokens:
-            self.device_tokens.discard(token)
-            print(f"🗑️ 무효한 토큰 제거됨: {token[:30]}...")
-            # 파일에서도 제거
-            self.save_tokens()
+        self.remove_device_tokens([token])
+
+    def remove_device_tokens(self, tokens):
+        """여러 토큰을 한 트랜잭션으로 제거"""
+        tokens = list(tokens)
+        if not tokens:
+            return
+        removed = self.token_store.remove(tokens)
+        with self._tokens_lock:
+            self.device_tokens.difference_update(tokens)
+        if removed:
+            print(f"🗑️ 무효한 토큰 {removed}개 제거됨")
             
     def get_token_info(self):
-        """현재 토큰 정보 반환"""
+        """현재 토큰 정보 반환 (토큰은 앞부분만 표시)"""
+        devices = self.token_store.metadata(limit=5)
         return {
             'total_tokens': len(self.device_tokens),
-            'tokens_preview': [token[:30] + '...' for token in list(self.device_tokens)[:5]]
+            'tokens_preview': [device['token'][:30] + '...' for device in devices],
+            'devices': [{'token': device['token'][:30] + '...',
+                         'last_seen': datetime.fromtimestamp(device['last_seen']).isoformat(timespec='seconds'),
+                         'failures': device['failures']} for device in devices]
         }
     
     def can_send_notification(self):
@@ -127,117 +115,128 @@ class FirebaseFCM:
             return True
         return False
     
-    def send_notification(self, title, body, image_url=None, click_url=None):
-        """FCM 푸시 알림 발송 (Firebase Admin SDK 사용)"""
-        print(f"🔍 FCM 알림 발송 시작: {title}")
-        
+    def _send_multicast(self, tokens, build_message, dry_run=False):
+        """토큰 목록을 MULTICAST_LIMIT개씩 묶어 send_each_for_multicast로 보냅니다.
+
+        Firebase Admin SDK는 앱마다 메시징 클라이언트(HTTP 세션)를 재사용하므로
+        토큰 N개를 보내도 묶음당 한 번의 요청만 발생합니다.
+        반환값: (성공 토큰 목록, 무효 토큰 목록, 그 밖에 실패한 토큰 목록, 일시적 오류 목록)
+        """
+        succeeded, invalid, failed, transient = [], [], [], []
+        errors = {}  # 오류 종류 → 토큰 수 (토큰마다 출력하지 않고 종류별로 한 번 출력)
+        tokens = list(tokens)
+        for start in range(0, len(tokens), MULTICAST_LIMIT):
+            batch = tokens[start:start + MULTICAST_LIMIT]
+            try:
+                response = messaging.send_each_for_multicast(build_message(batch), dry_run=dry_run, app=self.app)
+            except Exception as e:
+                # 묶음 전체 요청 실패 (네트워크 오류 등)
+                failed.extend(batch)
+                transient.append(e)
+                continue
+            for token, result in zip(batch, response.responses):
+                if result.success:
+                    succeeded.append(token)
+                elif isinstance(result.exception, INVALID_TOKEN_ERRORS):
+                    invalid.append(token)
+                else:
+                    failed.append(token)
+                    if isinstance(result.exception, TRANSIENT_ERRORS):
+                        transient.append(result.exception)
+                    else:
+                        name = type(result.exception).__name__
+                        errors[name] = errors.get(name, 0) + 1
+        for name, count in errors.items():
+            print(f"❌ FCM 발송 오류: {name} ({count}개 토큰)")
+        return succeeded, invalid, failed, transient
+
+    def send_notification(self, title, body, image_url=None, click_url=None, raise_errors=False,
+                          use_cooldown=True):
+        """FCM 푸시 알림 발송 (Firebase Admin SDK 멀티캐스트 사용)
+
+        raise_errors가 True이면 한 기기에도 전달하지 못하고 일시적 오류만 있었을 때
+        예외를 던져 호출 측(알림 작업자)이 재시도할 수 있게 합니다.
+        use_cooldown이 False이면 전역 쿨다운을 적용하지 않습니다. (사건 단위 알림)
+        """
         if not self.app:
             print("⚠️ Firebase Admin SDK가 초기화되지 않았습니다.")
             return False
             
         if not self.device_tokens:
             print("⚠️ 등록된 디바이스 토큰이 없습니다.")
-            print(f"현재 토큰 개수: {len(self.device_tokens)}")
             return False
             
-        print(f"🔍 등록된 토큰 개수: {len(self.device_tokens)}")
-        for i, token in enumerate(self.device_tokens):
-            print(f"토큰 {i+1}: {token[:30]}...")
-            
-        if not self.can_send_notification():
+        if use_cooldown and not self.can_send_notification():
             remaining = self.cooldown_minutes * 60 - (time.time() - self.last_notification_time)
             print(f"⏰ 쿨다운 중: {int(remaining)}초 후 알림 가능")
             return False
-            
-        success_count = 0
         
-        # 등록된 모든 토큰에 알림 발송
-        for token in list(self.device_tokens):
-            try:
-                print(f"🔍 토큰으로 메시지 전송 시도: {token[:30]}...")
-                
-                # FCM 메시지 구성
-                notification = messaging.Notification(
-                    title=title,
-                    body=body,
-                    image=image_url
-                )
-                
-                # 웹 푸시 설정
-                webpush_config = messaging.WebpushConfig(
-                    notification=messaging.WebpushNotification(
-                        title=title,
-                        body=body,
-                        icon="/static/favicon.ico",
-                        badge="/static/favicon.ico",
-                        image=image_url,
-                        tag="sonavi-detection"
-                    ),
-                    data={
-                        "click_action": click_url or "https://sonavi.duckdns.org:5000",
-                        "url": click_url or "https://sonavi.duckdns.org:5000",
-                        "timestamp": str(int(time.time()))
-                    },
-                    fcm_options=messaging.WebpushFCMOptions(
-                        link="https://sonavi.duckdns.org:5000"
-                    )
-                )
-                
-                # 메시지 생성
-                message = messaging.Message(
-                    notification=notification,
-                    webpush=webpush_config,
-                    token=token
-                )
-                
-                print("🔍 Firebase Admin SDK로 메시지 전송 중...")
-                
-                # FCM API 호출 (Firebase Admin SDK)
-                response = messaging.send(message)
-                
-                print(f"🔍 Firebase 응답: {response}")
-                
-                if response:
-                    success_count += 1
-                    print(f"✅ FCM 알림 발송 성공: {token[:20]}... (ID: {response})")
-                else:
-                    print(f"❌ FCM 알림 발송 실패: {token[:20]}...")
-                    
-            except messaging.UnregisteredError as e:
-                print(f"❌ 등록되지 않은 토큰 제거: {token[:20]}... - {e}")
-                self.remove_device_token(token)
-            except messaging.SenderIdMismatchError as e:
-                print(f"❌ 토큰 ID 불일치로 제거: {token[:20]}... - {e}")
-                self.remove_device_token(token)
-            except Exception as e:
-                print(f"❌ FCM 발송 중 상세 오류: {type(e).__name__}: {e}")
-                import traceback
-                print(f"🔍 전체 오류 스택:")
-                traceback.print_exc()
+        # 모든 토큰에 같은 알림 내용 사용
+        notification = messaging.Notification(
+            title=title,
+            body=body,
+            image=image_url
+        )
+        
+        # 웹 푸시 설정
+        webpush_config = messaging.WebpushConfig(
+            notification=messaging.WebpushNotification(
+                title=title,
+                body=body,
+                icon="/static/favicon.ico",
+                badge="/static/favicon.ico",
+                image=image_url,
+                tag="sonavi-detection"
+            ),
+            data={
+                "click_action": click_url or "https://sonavi.duckdns.org:5000",
+                "url": click_url or "https://sonavi.duckdns.org:5000",
+                "timestamp": str(int(time.time()))
+            },
+            fcm_options=messaging.WebpushFCMOptions(
+                link="https://sonavi.duckdns.org:5000"
+            )
+        )
+        
+        def build_message(tokens):
+            return messaging.MulticastMessage(tokens=tokens, notification=notification, webpush=webpush_config)
+        
+        tokens = self._token_snapshot()
+        succeeded, invalid, failed, transient = self._send_multicast(tokens, build_message)
+        
+        # 무효한 토큰은 모아서 한 번에 제거하고, 나머지는 토큰별 성공/실패 기록
+        self.remove_device_tokens(invalid)
+        self.token_store.record_results(succeeded, failed)
+        token_count = len(tokens)
                 
-        if success_count > 0:
+        if succeeded:
             self.last_notification_time = time.time()
-            print(f"📱 FCM 알림 발송 완료: {success_count}개 디바이스")
+            print(f"📱 FCM 알림 발송 완료: {len(succeeded)}/{token_count}개 디바이스")
             return True
         
-        print(f"❌ FCM 알림 발송 실패: 성공한 디바이스 0개")
+        print(f"❌ FCM 알림 발송 실패: 성공한 디바이스 0개 (무효 토큰 {len(invalid)}개, 일시적 오류 {len(transient)}건)")
+        if raise_errors and transient:
+            raise transient[0]
         return False
     
-    def send_detection_alert(self, detected_objects, confidence, duckdns_url):
-        """객체 감지 알림 발송"""
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # 감지된 객체들을 문자열로 변환
-        objects_str = ", ".join([f"{obj['name']}({obj['confidence']*100:.1f}%)" 
-                                for obj in detected_objects])
+    def send_incident_alert(self, incident, duckdns_url, image_url=None, raise_errors=False):
+        """사건 알림 발송 - 사건 동안 감지된 모든 객체와 최대 신뢰도를 한 번에 전달
+
+        사건 집계기가 사건마다 한 번만 호출하므로 전역 쿨다운은 적용하지 않습니다.
+        """
+        first_seen = datetime.fromtimestamp(incident.first_seen).strftime("%Y-%m-%d %H:%M:%S")
+        last_seen = datetime.fromtimestamp(incident.last_seen).strftime("%H:%M:%S")
         
-        title = "🚨 SoNaVi 카메라 감지 알림"
-        body = f"{current_time}\n감지된 객체: {objects_str}"
+        title = f"🚨 SoNaVi 카메라 감지 알림 ({incident.camera})"
+        body = f"{first_seen} ~ {last_seen}\n감지된 객체: {incident.summary()}"
         
         return self.send_notification(
             title=title,
             body=body,
-            click_url=duckdns_url
+            image_url=image_url,
+            click_url=duckdns_url,
+            raise_errors=raise_errors,
+            use_cooldown=False
         )
     
     def test_notification(self, ignore_cooldown=True):
@@ -273,40 +272,27 @@ class FirebaseFCM:
             
         print(f"🧹 토큰 정리 시작 - 현재 {len(self.device_tokens)}개 토큰")
         
-        # 로컬에서 접속하는 토큰들을 식별하기 위해 유효성 검사
-        valid_tokens = set()
-        invalid_tokens = set()
-        
-        for token in list(self.device_tokens):
-            try:
-                # Firebase의 dry_run 기능으로 토큰 유효성 검사
-                message = messaging.Message(
-                    notification=messaging.Notification(
-                        title="토큰 유효성 검사",
-                        body="이 메시지는 전송되지 않습니다."
-                    ),
-                    token=token
+        # Firebase의 dry_run 기능으로 실제 전송 없이 모든 토큰을 묶음 단위로 검증
+        def build_message(tokens):
+            return messaging.MulticastMessage(
+                tokens=tokens,
+                notification=messaging.Notification(
+                    title="토큰 유효성 검사",
+                    body="이 메시지는 전송되지 않습니다."
                 )
-                
-                # dry_run=True로 실제 전송하지 않고 토큰만 검증
-                response = messaging.send(message, dry_run=True)
-                if response:
-                    valid_tokens.add(token)
-                    print(f"✅ 유효한 토큰: {token[:30]}...")
-                
-            except Exception as e:
-                invalid_tokens.add(token)
-                print(f"❌ 무효한 토큰 발견: {token[:30]}... - {e}")
+            )
         
-        # 무효한 토큰들 제거
-        self.device_tokens = valid_tokens
+        valid_tokens, invalid_tokens, failed, transient = self._send_multicast(self._token_snapshot(),
+                                                                               build_message, dry_run=True)
+        
+        # 무효한 토큰들만 제거 (확인에 실패한 토큰은 유지)
+        self.remove_device_tokens(invalid_tokens)
         
         print(f"🧹 토큰 정리 완료:")
         print(f"   - 유효한 토큰: {len(valid_tokens)}개")
         print(f"   - 제거된 토큰: {len(invalid_tokens)}개")
-        
-        # 결과 저장
-        self.save_tokens()
+        if failed:
+            print(f"   - 확인 실패 (유지): {len(failed)}개")
         
     def startup_token_management(self):
         """프로그램 시작 시 토큰 관리"""
@@ -329,13 +315,8 @@ class FirebaseFCM:
     def limit_token_count(self, max_tokens=5):
         """토큰 개수 제한 (최대 5개로 제한)"""
         if len(self.device_tokens) > max_tokens:
-            # 가장 오래된 토큰들을 제거 (리스트로 변환 후 처음 것들 제거)
-            tokens_list = list(self.device_tokens)
-            tokens_to_remove = tokens_list[:-max_tokens]  # 최신 max_tokens개만 유지
-            
-            for token in tokens_to_remove:
-                self.device_tokens.discard(token)
-                print(f"🗑️ 오래된 토큰 제거: {token[:30]}...")
+            # 마지막 확인 시각이 가장 오래된 토큰들을 제거 (최근 max_tokens개만 유지)
+            tokens_to_remove = self.token_store.least_recent(max_tokens)
+            self.remove_device_tokens(tokens_to_remove)
             
             print(f"📊 토큰 개수 제한: {len(tokens_to_remove)}개 제거, {len(self.device_tokens)}개 유지")
-            self.save_tokens() 
\ No newline at end of file
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+class FrameGrabber:
+    """카메라에서 계속 프레임을 읽어 가장 최신 프레임만 보관하는 스레드
+
+    CAP_PROP_BUFFERSIZE를 무시하는 백엔드에서도 드라이버 버퍼에 오래된 프레임이
+    쌓이지 않도록 항상 읽기를 계속하고, 소비자는 최신 프레임만 가져갑니다.
+    프레임은 cap.read(image=슬롯)으로 링 버퍼 슬롯에 바로 기록되며, 소비자는
+    참조 수가 늘어난 FrameRef를 받아 다 쓰면 release()해야 합니다.
+    """
+
+    def __init__(self, cap, ring=None):
+        self.cap = cap
+        self.ring = ring or FrameRing()
+        self.running = False
+        self.thread = None
+        self._cond = threading.Condition()
+        self._ref = None  # 최신 프레임 슬롯 (읽기 스레드가 참조 1개 보유)
+        self._shape = None
+        self.seq = 0  # 새 프레임마다 증가하는 순번
+        self.timestamp = 0.0  # 마지막 프레임 캡처 시각
+        self.failed_reads = 0
+        self.last_success_time = time.time()
+
+    def start(self):
+        """프레임 읽기 스레드를 시작합니다."""
+        self.running = True
+        self.last_success_time = time.time()
+        self.thread = threading.Thread(target=self._run, name="frame-grabber")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        """프레임 읽기 스레드를 중지합니다."""
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        with self._cond:
+            ref, self._ref = self._ref, None
+        if ref is not None:
+            ref.release()
+
+    def is_alive(self):
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        while self.running:
+            # 이전 프레임과 같은 크기의 빈 슬롯에 바로 읽기 (첫 프레임은 크기를 모르므로 새 배열)
+            ref = self.ring.acquire(self._shape) if self._shape is not None else None
+            try:
+                if ref is not None:
+                    ret, frame = self.cap.read(ref.array)
+                else:
+                    ret, frame = self.cap.read()
+            except Exception as e:
+                print(f"프레임 읽기 스레드 오류: {e}")
+                ret, frame = False, None
+
+            # 유효하지 않은 프레임 (빈 프레임 또는 완전히 검은 프레임)
+            if not ret or frame is None or frame.size == 0 or not frame.any():
+                if ref is not None:
+                    ref.release()
+                self.failed_reads += 1
+                time.sleep(0.01)
+                continue
+
+            if ref is None or not np.may_share_memory(frame, ref.array):
+                # 첫 프레임이거나 해상도가 바뀐 경우: 슬롯을 새 크기로 잡아 한 번 복사
+                if ref is not None:
+                    ref.release()
+                ref = self.ring.acquire(frame.shape, frame.dtype)
+                if ref is None:
+                    # 모든 슬롯이 사용 중이면 이 프레임은 버림
+                    continue
+                ref.array[...] = frame
+                self._shape = frame.shape
+
+            with self._cond:
+                previous, self._ref = self._ref, ref
+                self.seq += 1
+                self.timestamp = time.time()
+                self.last_success_time = self.timestamp
+                self._cond.notify_all()
+            if previous is not None:
+                previous.release()
+
+    def read(self):
+        """최신 프레임을 대기 없이 반환합니다. (seq, timestamp, FrameRef) - 사용 후 release() 필요"""
+        with self._cond:
+            return self.seq, self.timestamp, self._ref.retain() if self._ref is not None else None
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0):
+        """last_seq 이후의 새 프레임이 올 때까지 대기합니다. 반환된 FrameRef는 사용 후 release()해야 합니다.
+
+        시간 내에 새 프레임이 없으면 (last_seq, None, None)을 반환합니다.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while self.running and self.seq <= last_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return last_seq, None, None
+                self._cond.wait(remaining)
+            if self.seq <= last_seq or self._ref is None:
+                return last_seq, None, None
+            return self.seq, self.timestamp, self._ref.retain()
+
+    def seconds_since_last_frame(self):
+        return time.time() - self.last_success_time
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """최신 항목만 유지하는 크기 제한 큐 (가득 차면 가장 오래된 항목을 버림)"""
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = max(1, maxsize)
+        self.on_drop = on_drop  # 버려진 항목에 대해 호출 (예: 링 버퍼 슬롯 반납)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """항목을 추가합니다. 큐가 가득 차 있으면 가장 오래된 항목을 버립니다."""
+        dropped = []
+        with self._cond:
+            while len(self._items) >= self.maxsize:
+                dropped.append(self._items.popleft())
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+        if self.on_drop is not None:
+            for old_item in dropped:
+                self.on_drop(old_item)
+
+    def get(self, timeout=None):
+        """가장 오래된 항목을 꺼냅니다. 시간 초과 시 None을 반환합니다."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def clear(self):
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+
+class FramePacket:
+    """파이프라인 단계 사이를 오가는 프레임 묶음
+
+    frame이 링 버퍼 슬롯(ref)에 있으면 패킷을 받은 단계마다 참조를 하나씩 가지며,
+    PipelineStage가 다음 단계로 넘길 때 retain()하고 처리를 마치면 release()합니다.
+    """
+
+    __slots__ = ('seq', 'timestamp', 'frame', 'ref', 'display_frame', 'stream_frame', 'detections')
+
+    def __init__(self, seq, timestamp, frame, ref=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+        self.ref = ref
+        self.display_frame = None
+        self.stream_frame = None
+        self.detections = None
+
+    def retain(self):
+        if self.ref is not None:
+            self.ref.retain()
+        return self
+
+    def release(self):
+        if self.ref is not None:
+            self.ref.release()
+
+
+class StageStats:
+    """단계별 처리 속도(FPS)와 처리 시간 통계"""
+
+    def __init__(self, name, window=60):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self._timestamps = deque(maxlen=window)
+        self._durations = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, duration):
+        with self._lock:
+            self.processed += 1
+            self._timestamps.append(time.time())
+            self._durations.append(duration)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def fps(self):
+        with self._lock:
+            if len(self._timestamps) < 2:
+                return 0.0
+            span = self._timestamps[-1] - self._timestamps[0]
+            # 마지막 처리 이후 오래 멈춰 있으면 0으로 간주
+            if span <= 0 or time.time() - self._timestamps[-1] > 2.0:
+                return 0.0
+            return (len(self._timestamps) - 1) / span
+
+    def avg_latency_ms(self):
+        with self._lock:
+            if not self._durations:
+                return 0.0
+            return sum(self._durations) / len(self._durations) * 1000
+
+
+def _retain(item):
+    retain = getattr(item, 'retain', None)
+    return retain() if retain is not None else item
+
+
+def _release(item):
+    release = getattr(item, 'release', None)
+    if release is not None:
+        release()
+
+
+class PipelineStage:
+    """입력 큐에서 항목을 꺼내 처리하고 출력 큐로 넘기는 단계 스레드
+
+    입력 큐가 없는 단계(소스 단계)는 func()를 인자 없이 반복 호출합니다.
+    func가 None을 반환하면 다음 단계로 아무것도 넘기지 않습니다.
+    """
+
+    def __init__(self, name, func, input_queue=None, output_queues=None, get_timeout=0.5):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queues = output_queues or []
+        self.get_timeout = get_timeout
+        self.stats = StageStats(name)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        self.running = False
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+
+    def _run(self):
+        while self.running:
+            item = result = None
+            try:
+                if self.input_queue is not None:
+                    item = self.input_queue.get(timeout=self.get_timeout)
+                    if item is None:
+                        continue
+                    start = time.time()
+                    result = self.func(item)
+                else:
+                    start = time.time()
+                    result = self.func()
+
+                if result is None:
+                    continue
+
+                self.stats.record(time.time() - start)
+                for output_queue in self.output_queues:
+                    output_queue.put(_retain(result))
+
+            except Exception as e:
+                self.stats.record_error()
+                print(f"파이프라인 단계 '{self.name}' 오류: {e}")
+                time.sleep(0.1)
+            finally:
+                # 이 단계가 가진 참조 반납 (다음 단계는 위에서 각자 참조를 얻음)
+                _release(item)
+                if result is not item:
+                    _release(result)
+
+    def get_stats(self):
+        return {
+            'fps': round(self.stats.fps(), 1),
+            'avg_latency_ms': round(self.stats.avg_latency_ms(), 1),
+            'processed': self.stats.processed,
+            'errors': self.stats.errors,
+            'queue_depth': self.input_queue.qsize() if self.input_queue is not None else 0,
+            'queue_dropped': self.input_queue.dropped if self.input_queue is not None else 0,
+        }
+
+
+class FramePipeline:
+    """캡처 → 추론 → 주석/인코딩 → 전송 단계를 묶어 관리하는 파이프라인"""
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, func, input_queue=None, output_queues=None):
+        stage = PipelineStage(name, func, input_queue, output_queues)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        print(f"프레임 파이프라인 시작: {' → '.join(stage.name for stage in self.stages)}")
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for stage in self.stages:
+            if stage.input_queue is not None:
+                stage.input_queue.clear()
+        print("프레임 파이프라인 중지 완료")
+
+    def is_running(self):
+        return any(stage.running for stage in self.stages)
+
+    def get_stats(self):
+        return {stage.name: stage.get_stats() for stage in self.stages}
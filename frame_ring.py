@@ -0,0 +1,145 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRef:
+    """링 버퍼 슬롯 하나에 대한 참조 (retain/release로 참조 수를 관리)"""
+
+    __slots__ = ('ring', 'slot', 'generation', 'array')
+
+    def __init__(self, ring, slot, generation, array):
+        self.ring = ring
+        self.slot = slot
+        self.generation = generation
+        self.array = array
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def retain(self):
+        """참조 수를 늘리고 자신을 반환합니다. (다른 소비자에게 넘길 때 사용)"""
+        self.ring._retain(self)
+        return self
+
+    def release(self):
+        """참조 수를 줄입니다. 0이 되면 슬롯을 다시 쓸 수 있습니다."""
+        self.ring._release(self)
+
+
+class FrameRing:
+    """미리 할당한 고정 슬롯에 프레임을 담아 모든 소비자가 공유하는 링 버퍼
+
+    캡처 스레드가 빈 슬롯(참조 수 0)에 프레임을 한 번 기록하면, 추론/인코딩/녹화
+    등의 소비자는 복사 없이 슬롯을 참조하고 다 쓰면 release()합니다. 프레임마다
+    새 배열을 할당하지 않으므로 메모리 사용량이 일정하게 유지됩니다.
+    shared=True이면 슬롯을 multiprocessing.shared_memory에 두어 다른 프로세스가
+    attach()로 같은 메모리를 읽을 수 있습니다.
+    """
+
+    def __init__(self, slots=16, max_shape=None, shared=False):
+        self.slots = slots
+        self.shared = shared
+        self.owner = True
+        self.slot_bytes = 0
+        self.generation = 0
+        self.exhausted = 0  # 빈 슬롯이 없어 프레임을 받지 못한 횟수
+        self._storage = None
+        self._buffer = None
+        self._retired = []
+        self._refcounts = [0] * slots
+        self._next = 0
+        self._lock = threading.Lock()
+        if max_shape is not None:
+            self._allocate(int(np.prod(max_shape)))
+
+    @classmethod
+    def attach(cls, name, slots, slot_bytes):
+        """다른 프로세스가 만든 공유 메모리 링에 연결합니다. (읽기용, 참조 수는 관리하지 않음)"""
+        ring = cls(slots, shared=True)
+        ring.owner = False
+        ring.slot_bytes = slot_bytes
+        ring._storage = shared_memory.SharedMemory(name=name)
+        ring._buffer = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=ring._storage.buf)
+        return ring
+
+    @property
+    def name(self):
+        return self._storage.name if self._storage is not None else None
+
+    def _allocate(self, slot_bytes):
+        """슬롯 메모리를 (다시) 할당합니다. 이전 메모리를 참조 중인 FrameRef는 그대로 유효합니다."""
+        if self._storage is not None:
+            self._retired.append(self._storage)
+        if self.shared:
+            self._storage = shared_memory.SharedMemory(create=True, size=self.slots * slot_bytes)
+            self._buffer = np.ndarray((self.slots, slot_bytes), dtype=np.uint8, buffer=self._storage.buf)
+        else:
+            self._buffer = np.empty((self.slots, slot_bytes), dtype=np.uint8)
+        self.slot_bytes = slot_bytes
+        self.generation += 1
+        self._refcounts = [0] * self.slots
+
+    def acquire(self, shape, dtype=np.uint8):
+        """빈 슬롯을 shape 크기로 잡아 참조 수 1의 FrameRef를 반환합니다. 빈 슬롯이 없으면 None."""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        with self._lock:
+            if nbytes > self.slot_bytes:
+                # 첫 프레임이거나 해상도가 커진 경우에만 재할당
+                self._allocate(nbytes)
+            for i in range(self.slots):
+                slot = (self._next + i) % self.slots
+                if self._refcounts[slot] == 0:
+                    break
+            else:
+                self.exhausted += 1
+                return None
+            self._refcounts[slot] = 1
+            self._next = (slot + 1) % self.slots
+            array = self._buffer[slot, :nbytes].view(dtype).reshape(shape)
+            return FrameRef(self, slot, self.generation, array)
+
+    def view(self, slot, shape, dtype=np.uint8):
+        """슬롯 번호와 shape로 배열을 복사 없이 가져옵니다. (attach()한 프로세스에서 사용)"""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        return self._buffer[slot, :nbytes].view(dtype).reshape(shape)
+
+    def _retain(self, ref):
+        with self._lock:
+            if ref.generation == self.generation:
+                self._refcounts[ref.slot] += 1
+
+    def _release(self, ref):
+        with self._lock:
+            # 재할당 이전 세대의 슬롯은 더 이상 추적하지 않음
+            if ref.generation == self.generation and self._refcounts[ref.slot] > 0:
+                self._refcounts[ref.slot] -= 1
+
+    def in_use(self):
+        with self._lock:
+            return sum(1 for count in self._refcounts if count > 0)
+
+    def close(self):
+        self._buffer = None
+        for storage in self._retired + ([self._storage] if self._storage is not None else []):
+            try:
+                storage.close()
+                if self.owner:
+                    storage.unlink()
+            except (BufferError, FileNotFoundError):
+                pass
+        self._retired = []
+        self._storage = None
+
+    def get_stats(self):
+        return {
+            'slots': self.slots,
+            'in_use': self.in_use(),
+            'slot_bytes': self.slot_bytes,
+            'exhausted': self.exhausted,
+            'shared': self.shared,
+        }
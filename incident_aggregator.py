@@ -0,0 +1,168 @@
+import secrets
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+
+class Incident:
+    """짧은 시간 안에 이어진 감지를 하나로 묶은 사건"""
+
+    def __init__(self, camera, timestamp):
+        self.camera = camera
+        # 썸네일 URL에 쓰이므로 시각만으로 추측할 수 없도록 무작위 접미사를 붙임
+        self.id = f"{camera}-{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}-{secrets.token_hex(8)}"
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.classes = {}  # 라벨 → 최대 신뢰도
+        self.counts = {}  # 라벨 → 감지 횟수
+        self.max_confidence = 0.0
+        self.alerted = False
+        self._thumbnail = None  # 최고 신뢰도 감지 영역 (축소한 BGR 이미지)
+        self._thumbnail_jpeg = None
+        self._lock = threading.Lock()
+
+    def add(self, label, confidence, timestamp):
+        self.last_seen = timestamp
+        self.counts[label] = self.counts.get(label, 0) + 1
+        if confidence > self.classes.get(label, 0.0):
+            self.classes[label] = confidence
+
+    @property
+    def duration(self):
+        return self.last_seen - self.first_seen
+
+    def summary(self):
+        """'person(92.1%), cat(80.4%)' 형태의 요약 (신뢰도 높은 순)"""
+        return ", ".join(f"{label}({confidence * 100:.1f}%)"
+                         for label, confidence in sorted(self.classes.items(), key=lambda item: -item[1]))
+
+    def set_thumbnail(self, image):
+        with self._lock:
+            self._thumbnail = image
+            self._thumbnail_jpeg = None
+
+    def thumbnail_jpeg(self, quality=70):
+        """썸네일을 JPEG 바이트로 반환합니다. (처음 요청할 때 한 번만 인코딩, 없으면 None)"""
+        with self._lock:
+            if self._thumbnail_jpeg is None and self._thumbnail is not None:
+                ok, buffer = cv2.imencode('.jpg', self._thumbnail, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                if ok:
+                    self._thumbnail_jpeg = buffer.tobytes()
+            return self._thumbnail_jpeg
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'camera': self.camera,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'classes': {label: round(confidence, 3) for label, confidence in self.classes.items()},
+            'counts': dict(self.counts),
+            'max_confidence': round(self.max_confidence, 3),
+        }
+
+
+class IncidentAggregator:
+    """감시 대상 감지를 사건 단위로 묶어 사건마다 알림을 한 번만 보내는 집계기
+
+    첫 감지 후 window초 동안 들어온 감지(모든 클래스, 클래스별 최대 신뢰도)를 모아
+    on_alert(incident)를 한 번 호출합니다. 이후 idle_timeout초 안에 다시 감지되면 같은
+    사건으로 이어지고 알림을 다시 보내지 않습니다. 사건이 max_duration초를 넘으면
+    닫고 새 사건을 시작합니다. 썸네일은 가장 높은 신뢰도의 감지 영역을 잘라 보관합니다.
+
+    observe()는 프레임 루프에서 호출되므로 on_alert는 대기열에 넣기만 해야 합니다.
+    """
+
+    def __init__(self, camera='', window=3.0, idle_timeout=30.0, max_duration=600.0, thumbnail_size=320,
+                 thumbnail_padding=0.15, thumbnail_quality=70, on_alert=None):
+        self.camera = camera
+        self.window = window
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_padding = thumbnail_padding
+        self.thumbnail_quality = thumbnail_quality
+        self.on_alert = on_alert
+        self.incident = None
+        self.last_incident = None
+        self.incidents = 0
+        self.alerts = 0
+        self.detections = 0
+
+    @classmethod
+    def from_config(cls, settings, camera='', idle_timeout=30.0, on_alert=None):
+        return cls(camera=camera,
+                   window=settings.get('incident_window', 3.0),
+                   idle_timeout=settings.get('incident_idle_seconds', idle_timeout),
+                   max_duration=settings.get('incident_max_seconds', 600.0),
+                   thumbnail_size=settings.get('thumbnail_size', 320),
+                   thumbnail_quality=settings.get('thumbnail_quality', 70),
+                   on_alert=on_alert)
+
+    def observe(self, detections, frame, timestamp=None):
+        """감시 대상 감지 목록 [(라벨, 신뢰도, (x, y, w, h)), ...]을 반영합니다. (빈 목록도 호출 가능)"""
+        timestamp = timestamp or time.time()
+        incident = self.incident
+
+        # 오래 조용했거나 너무 길어진 사건은 닫음
+        if incident is not None and (timestamp - incident.last_seen > self.idle_timeout
+                                     or timestamp - incident.first_seen > self.max_duration):
+            self._close(incident)
+            incident = None
+
+        if detections:
+            if incident is None:
+                incident = self.incident = Incident(self.camera, timestamp)
+                self.incidents += 1
+            best = None
+            for label, confidence, box in detections:
+                incident.add(label, confidence, timestamp)
+                self.detections += 1
+                if confidence > incident.max_confidence and (best is None or confidence > best[0]):
+                    best = (confidence, box)
+            if best is not None and frame is not None:
+                incident.max_confidence = best[0]
+                incident.set_thumbnail(self._crop(frame, best[1]))
+
+        # 모으는 시간이 지나면 알림 한 번 전송
+        if incident is not None and not incident.alerted and timestamp - incident.first_seen >= self.window:
+            incident.alerted = True
+            self.alerts += 1
+            if self.on_alert is not None:
+                self.on_alert(incident)
+
+    def _close(self, incident):
+        if not incident.alerted:
+            # window가 지나기 전에 끝난 짧은 사건도 한 번은 알림
+            incident.alerted = True
+            self.alerts += 1
+            if self.on_alert is not None:
+                self.on_alert(incident)
+        self.last_incident = incident
+        self.incident = None
+
+    def _crop(self, frame, box):
+        """감지 영역을 여유를 두고 잘라 thumbnail_size 이하로 축소합니다. (새 배열 반환)"""
+        height, width = frame.shape[:2]
+        x, y, w, h = box
+        pad_x, pad_y = int(w * self.thumbnail_padding), int(h * self.thumbnail_padding)
+        x1, y1 = max(0, int(x) - pad_x), max(0, int(y) - pad_y)
+        x2, y2 = min(width, int(x + w) + pad_x), min(height, int(y + h) + pad_y)
+        if x2 <= x1 or y2 <= y1:
+            x1, y1, x2, y2 = 0, 0, width, height
+        crop = frame[y1:y2, x1:x2]
+        scale = min(1.0, self.thumbnail_size / max(crop.shape[0], crop.shape[1]))
+        size = (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale)))
+        # 링 버퍼 슬롯을 참조하지 않도록 항상 복사본을 만듦
+        return cv2.resize(crop, size, interpolation=cv2.INTER_AREA) if scale < 1.0 else crop.copy()
+
+    def get_stats(self):
+        incident = self.incident
+        return {
+            'active': incident.to_dict() if incident is not None else None,
+            'incidents': self.incidents,
+            'alerts': self.alerts,
+            'detections': self.detections,
+        }
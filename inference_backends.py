@@ -0,0 +1,290 @@
+import ast
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+# 모델 종류별 가중치 파일 경로
+MODEL_PATHS = {
+    'nano': "object_detection_yolov5/yolov5n.pt",
+    'small': "object_detection_yolov5/yolov5s.pt",
+    'medium': "object_detection_yolov5/yolov5m.pt",
+    'large': "object_detection_yolov5/yolov5l.pt",
+}
+
+
+def letterbox_batch(images, imgsz, buffers=None):
+    """레터박스로 정사각형 입력을 만들고 (B, 3, H, W) float32 배치와 좌표 변환 정보를 반환합니다.
+
+    buffers(dict)를 넘기면 배치/축소/텐서 배열을 그 안에 보관해 다음 호출에서 재사용합니다.
+    """
+    buffers = {} if buffers is None else buffers
+    batch_shape = (len(images), imgsz, imgsz, 3)
+    batch = buffers.get('batch')
+    if batch is None or batch.shape != batch_shape:
+        batch = buffers['batch'] = np.empty(batch_shape, dtype=np.uint8)
+        buffers['tensor'] = np.empty((len(images), 3, imgsz, imgsz), dtype=np.float32)
+    batch.fill(114)
+
+    transforms = []
+    for i, image in enumerate(images):
+        height, width = image.shape[:2]
+        scale = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+        resize_buffers = buffers.setdefault('resized', {})
+        resized = resize_buffers.get((new_h, new_w))
+        if resized is None:
+            if len(resize_buffers) >= 8:
+                # ROI 추론은 크기가 매번 달라질 수 있으므로 캐시 크기를 제한
+                resize_buffers.clear()
+            resized = resize_buffers[(new_h, new_w)] = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        cv2.resize(image, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+        batch[i, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+        transforms.append((scale, pad_x, pad_y, width, height))
+    # BGR → RGB, HWC → CHW, 0~1 정규화 (미리 할당한 텐서에 바로 기록)
+    tensor = buffers['tensor']
+    np.multiply(batch[..., ::-1].transpose(0, 3, 1, 2), 1.0 / 255.0, out=tensor, casting='unsafe')
+    return tensor, transforms
+
+
+class InferenceBackend:
+    """추론 엔진 공통 인터페이스
+
+    predict()는 이미지마다 (N, 6) [x1, y1, x2, y2, conf, cls] numpy 배열을 반환하며,
+    좌표는 입력 이미지 기준입니다. 어떤 엔진을 쓰든 detect_objects는 동일하게 동작합니다.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.names = {}
+
+    def predict(self, images, conf, imgsz=640):
+        raise NotImplementedError
+
+    def close(self):
+        """엔진이 사용하는 자원을 해제합니다."""
+        pass
+
+    def __call__(self, images, conf, imgsz=640):
+        return self.predict(images, conf, imgsz)
+
+
+class TorchBackend(InferenceBackend):
+    """ultralytics YOLO (PyTorch) 추론 엔진"""
+
+    name = 'torch'
+
+    def __init__(self, model_path, threads=None):
+        super().__init__()
+        # torch/ultralytics는 무거우므로 실제로 사용할 때만 import
+        import torch
+        from ultralytics import YOLO
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, images, conf, imgsz=640):
+        results = self.model(images, conf=conf, imgsz=imgsz, verbose=False)
+        return [result.boxes.data.cpu().numpy() for result in results]
+
+
+class _ExportedBackend(InferenceBackend):
+    """내보낸(ONNX/OpenVINO) YOLO 모델의 공통 전처리/후처리"""
+
+    iou_threshold = 0.45
+
+    def __init__(self):
+        super().__init__()
+        # 전처리 버퍼 재사용 (입력 크기/배치 크기가 같으면 프레임마다 새로 할당하지 않음)
+        self._buffers = {}
+        self._buffers_lock = threading.Lock()
+
+    def _set_names(self, names, source):
+        """내보낸 모델의 클래스 이름을 설정합니다. 없으면 감지 결과를 해석할 수 없으므로 로드를 중단합니다."""
+        if not names:
+            raise ValueError(f"클래스 이름(names) 메타데이터가 없습니다: {source} "
+                             "(ultralytics로 다시 내보내거나 PyTorch 엔진을 사용하세요)")
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        self.names = {int(class_id): name for class_id, name in names.items()}
+
+    def _postprocess(self, output, transforms, conf):
+        """(B, 4+nc, N) 출력을 신뢰도 필터 + 클래스별 NMS 후 원본 좌표로 되돌립니다."""
+        results = []
+        for prediction, (scale, pad_x, pad_y, width, height) in zip(output, transforms):
+            prediction = prediction.T  # (N, 4+nc)
+            scores = prediction[:, 4:]
+            class_ids = scores.argmax(axis=1)
+            confidences = scores[np.arange(len(scores)), class_ids]
+            keep = confidences >= conf
+            if not keep.any():
+                results.append(np.zeros((0, 6), dtype=np.float32))
+                continue
+
+            boxes = prediction[keep, :4]
+            confidences = confidences[keep]
+            class_ids = class_ids[keep]
+
+            # cx, cy, w, h → x, y, w, h (NMS 입력 형식)
+            xywh = boxes.copy()
+            xywh[:, :2] -= xywh[:, 2:] / 2
+            indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confidences.tolist(), class_ids.tolist(),
+                                              conf, self.iou_threshold)
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+            xywh = xywh[indices]
+            xyxy = np.empty_like(xywh)
+            xyxy[:, 0] = (xywh[:, 0] - pad_x) / scale
+            xyxy[:, 1] = (xywh[:, 1] - pad_y) / scale
+            xyxy[:, 2] = (xywh[:, 0] + xywh[:, 2] - pad_x) / scale
+            xyxy[:, 3] = (xywh[:, 1] + xywh[:, 3] - pad_y) / scale
+            xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+            xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+
+            results.append(np.column_stack([xyxy, confidences[indices],
+                                            class_ids[indices]]).astype(np.float32))
+        return results
+
+    def _run(self, tensor):
+        raise NotImplementedError
+
+    def predict(self, images, conf, imgsz=640):
+        with self._buffers_lock:
+            tensor, transforms = letterbox_batch(images, imgsz, self._buffers)
+            output = self._run(tensor)
+        return self._postprocess(output, transforms, conf)
+
+
+class OnnxRuntimeBackend(_ExportedBackend):
+    """ONNX Runtime CPU 추론 엔진"""
+
+    name = 'onnx'
+
+    def __init__(self, onnx_path, threads=None):
+        super().__init__()
+        import onnxruntime as ort
+
+        if onnx_path.endswith('_int8.onnx'):
+            self.name = 'onnx-int8'
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # ultralytics가 내보낸 모델의 메타데이터에서 클래스 이름 읽기
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self._set_names(ast.literal_eval(metadata['names']) if 'names' in metadata else None, onnx_path)
+
+    def _run(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+
+class OpenVINOBackend(_ExportedBackend):
+    """OpenVINO CPU 추론 엔진"""
+
+    name = 'openvino'
+
+    def __init__(self, model_dir, threads=None):
+        super().__init__()
+        import yaml
+        from openvino.runtime import Core
+
+        xml_files = [f for f in os.listdir(model_dir) if f.endswith('.xml')]
+        if not xml_files:
+            raise FileNotFoundError(f"OpenVINO IR(.xml) 파일이 없습니다: {model_dir}")
+
+        core = Core()
+        config = {'INFERENCE_NUM_THREADS': str(threads)} if threads else {}
+        model = core.read_model(os.path.join(model_dir, xml_files[0]))
+        self.compiled_model = core.compile_model(model, 'CPU', config)
+        self.output = self.compiled_model.output(0)
+
+        metadata_path = os.path.join(model_dir, 'metadata.yaml')
+        names = None
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                names = (yaml.safe_load(f) or {}).get('names')
+        self._set_names(names, metadata_path)
+
+    def _run(self, tensor):
+        return self.compiled_model([tensor])[self.output]
+
+
+def export_model(model_path, fmt):
+    """.pt 모델을 ONNX/OpenVINO로 내보내고 결과를 캐시합니다. 캐시된 경로를 반환합니다."""
+    base, _ = os.path.splitext(model_path)
+    if fmt == 'onnx':
+        exported_path = base + '.onnx'
+    elif fmt == 'openvino':
+        exported_path = base + '_openvino_model'
+    else:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
+
+    # 캐시가 원본 가중치보다 최신이면 재사용
+    if os.path.exists(exported_path) and os.path.getmtime(exported_path) >= os.path.getmtime(model_path):
+        return exported_path
+
+    print(f"{fmt} 형식으로 모델 내보내는 중: {model_path} → {exported_path}")
+    from ultralytics import YOLO
+    # dynamic=True: ROI 추론에서 배치 크기와 입력 크기를 바꿀 수 있도록 함
+    YOLO(model_path).export(format=fmt, dynamic=True)
+    if not os.path.exists(exported_path):
+        raise FileNotFoundError(f"내보낸 모델을 찾을 수 없습니다: {exported_path}")
+    return exported_path
+
+
+def create_backend(model_path, settings=None):
+    """설정에 맞는 추론 엔진을 만듭니다. 실패하면 다음 엔진으로, 마지막에는 PyTorch로 대체합니다."""
+    settings = settings or {}
+    if settings.get('worker') == 'process':
+        # 추론을 별도 프로세스에서 실행 (자식 프로세스 안에서 이 함수를 다시 호출)
+        from inference_process import ProcessInferenceBackend
+        backend = ProcessInferenceBackend(model_path, settings)
+        print(f"추론 엔진: {backend.name} (별도 프로세스)")
+        return backend
+
+    backend_name = settings.get('backend', 'torch')
+    threads = settings.get('threads') or os.cpu_count()
+
+    candidates = {
+        'openvino': ['openvino', 'onnx', 'torch'],
+        'onnx': ['onnx', 'torch'],
+    }.get(backend_name, ['torch'])
+
+    # INT8 양자화 모델은 ONNX Runtime으로 실행
+    if settings.get('precision') == 'int8':
+        if 'onnx' in candidates:
+            candidates = ['onnx-int8'] + candidates
+        else:
+            print("⚠️ INT8 모델은 onnx/openvino 엔진 설정에서만 사용할 수 있습니다.")
+
+    for name in candidates:
+        try:
+            if name == 'onnx-int8':
+                from quantization import quantize_model
+                int8_path = quantize_model(export_model(model_path, 'onnx'),
+                                           settings.get('calibration_dirs', ['recordings', 'snapshots']),
+                                           settings.get('calibration_frames', 200))
+                backend = OnnxRuntimeBackend(int8_path, threads)
+            elif name == 'openvino':
+                backend = OpenVINOBackend(export_model(model_path, 'openvino'), threads)
+            elif name == 'onnx':
+                backend = OnnxRuntimeBackend(export_model(model_path, 'onnx'), threads)
+            else:
+                backend = TorchBackend(model_path, settings.get('threads'))
+            print(f"추론 엔진: {backend.name} (스레드 {threads})")
+            return backend
+        except Exception as e:
+            print(f"⚠️ {name} 추론 엔진을 사용할 수 없습니다: {e}")
+
+    raise RuntimeError("사용 가능한 추론 엔진이 없습니다.")
@@ -0,0 +1,184 @@
+import multiprocessing as mp
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameRing
+from inference_backends import InferenceBackend
+
+
+def _worker_main(model_path, settings, ring_name, slots, slot_bytes, requests, results):
+    """추론 프로세스 본체: 공유 메모리에서 프레임을 읽어 추론하고 결과만 큐로 돌려보냅니다."""
+    from inference_backends import create_backend
+
+    ring = FrameRing.attach(ring_name, slots, slot_bytes)
+    try:
+        backend = create_backend(model_path, settings)
+    except Exception as e:
+        results.put(('error', str(e)))
+        ring.close()
+        return
+    results.put(('ready', (backend.name, backend.names)))
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, frames, conf, imgsz = request
+        try:
+            images = [ring.view(slot, shape) for slot, shape in frames]
+            results.put((request_id, backend.predict(images, conf, imgsz=imgsz)))
+        except Exception as e:
+            results.put((request_id, e))
+
+    ring.close()
+
+
+class ProcessInferenceBackend(InferenceBackend):
+    """별도 프로세스에서 추론을 실행하는 엔진
+
+    YOLO 전처리/후처리의 파이썬 코드가 Flask 요청 처리나 JPEG 인코딩과 GIL을
+    두고 경쟁하지 않도록 추론을 자식 프로세스로 분리합니다. 프레임은 공유 메모리
+    슬롯으로 전달하고(배열 pickle 없음), 결과는 작은 (N, 6) 배열만 큐로 받습니다.
+    슬롯(max_shape)보다 큰 프레임은 축소해서 넘기고 결과 좌표를 원래 크기로 되돌립니다.
+    """
+
+    def __init__(self, model_path, settings=None, slots=8, max_shape=(1080, 1920, 3), timeout=10.0):
+        super().__init__()
+        settings = dict(settings or {})
+        settings['worker'] = 'thread'  # 자식 프로세스 안에서는 일반 엔진 사용
+        self.timeout = timeout
+
+        # 자식 프로세스가 연결한 뒤에는 재할당할 수 없으므로 최대 크기로 미리 할당
+        self.ring = FrameRing(slots, max_shape=max_shape, shared=True)
+        self.max_shape = max_shape
+        self.free_slots = threading.Semaphore(slots)
+
+        context = mp.get_context('spawn')
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.process = context.Process(target=_worker_main, name="inference-worker",
+                                       args=(model_path, settings, self.ring.name, slots, self.ring.slot_bytes,
+                                             self.requests, self.results))
+        self.process.daemon = True
+        self.process.start()
+
+        # 자식 프로세스에서 모델 로드가 끝날 때까지 대기 (내보내기/양자화가 포함될 수 있음)
+        status, payload = None, None
+        while status is None:
+            try:
+                status, payload = self.results.get(timeout=1.0)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    status, payload = 'error', f"exit code {self.process.exitcode}"
+        if status != 'ready':
+            self.close()
+            raise RuntimeError(f"추론 프로세스 시작 실패: {payload}")
+        self.name = f"process/{payload[0]}"
+        self.names = payload[1]
+
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_results, name="inference-results")
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read_results(self):
+        """결과 큐를 읽어 요청한 스레드에 전달하고, 다 쓴 슬롯을 반납합니다."""
+        while True:
+            try:
+                request_id, outputs = self.results.get()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+            if pending is None:
+                continue
+            event, refs, box = pending
+            # 자식 프로세스가 응답한 뒤에만 슬롯을 재사용 (시간 초과된 요청도 여기서 반납)
+            for ref in refs:
+                ref.release()
+                self.free_slots.release()
+            box.append(outputs)
+            event.set()
+
+    def predict(self, images, conf, imgsz=640):
+        if len(images) > self.ring.slots:
+            # 한 번에 담을 수 없는 배치는 나눠서 요청
+            outputs = []
+            for start in range(0, len(images), self.ring.slots):
+                outputs.extend(self.predict(images[start:start + self.ring.slots], conf, imgsz))
+            return outputs
+
+        fitted = [self._fit_slot(image) for image in images]
+
+        refs = []
+        event, box = threading.Event(), []
+        request_id = None
+        try:
+            for image, _ in fitted:
+                if not self.free_slots.acquire(timeout=self.timeout):
+                    raise TimeoutError("추론 프로세스의 빈 슬롯 대기 시간 초과")
+                try:
+                    ref = self.ring.acquire(image.shape)
+                    if ref is None:
+                        raise RuntimeError("추론 프로세스의 공유 메모리 슬롯이 모두 사용 중입니다.")
+                except Exception:
+                    self.free_slots.release()
+                    raise
+                refs.append(ref)
+                np.copyto(ref.array, image)
+            frames = [(ref.slot, ref.shape) for ref in refs]
+
+            with self._lock:
+                request_id = self._next_id
+                self._next_id += 1
+                self._pending[request_id] = (event, refs, box)
+            self.requests.put((request_id, frames, conf, imgsz))
+        except Exception:
+            # 요청을 보내지 못했으면 결과 읽기 스레드가 반납하지 않으므로 여기서 반납
+            if request_id is not None:
+                with self._lock:
+                    self._pending.pop(request_id, None)
+            for ref in refs:
+                ref.release()
+                self.free_slots.release()
+            raise
+
+        if not event.wait(self.timeout):
+            if not self.process.is_alive():
+                raise RuntimeError("추론 프로세스가 종료되었습니다.")
+            raise TimeoutError("추론 프로세스 응답 시간 초과")
+        if isinstance(box[0], Exception):
+            raise box[0]
+        outputs = box[0]
+        for output, (_, scale) in zip(outputs, fitted):
+            if scale != 1.0:
+                output[:, :4] /= scale
+        return outputs
+
+    def _fit_slot(self, image):
+        """슬롯보다 큰 이미지는 비율을 유지해 축소합니다. (이미지, 축소 비율)을 반환합니다."""
+        if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != self.max_shape[2]:
+            raise ValueError(f"공유 메모리 슬롯에 넣을 수 없는 이미지입니다: {image.shape} {image.dtype}")
+        height, width = image.shape[:2]
+        long_side, short_side = max(self.max_shape[:2]), min(self.max_shape[:2])
+        scale = min(1.0, long_side / max(height, width), short_side / min(height, width))
+        if scale == 1.0:
+            return image, 1.0
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+    def close(self):
+        if self.ring is None:
+            return
+        if self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.ring.close()
+        self.ring = None
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+
+
+class InferenceRequest:
+    """카메라 한 대의 추론 요청 (이미지 목록과 결과 대기 이벤트)"""
+
+    __slots__ = ('images', 'conf', 'imgsz', 'event', 'outputs', 'error')
+
+    def __init__(self, images, conf, imgsz):
+        self.images = images
+        self.conf = conf
+        self.imgsz = imgsz
+        self.event = threading.Event()
+        self.outputs = None
+        self.error = None
+
+
+class InferenceServer:
+    """여러 카메라의 추론 요청을 모아 한 번의 모델 호출로 처리하는 공유 추론 작업자
+
+    첫 요청이 들어오면 max_wait 초 동안(또는 max_batch장이 찰 때까지) 다른 카메라의
+    요청을 더 모은 뒤, 입력 크기가 같은 요청끼리 한 배치로 추론하고 결과를 요청한
+    카메라에 돌려줍니다. 백엔드와 같은 predict() 인터페이스를 제공하므로
+    SmartHomeCam.model 자리에 그대로 사용할 수 있습니다.
+    """
+
+    name = 'shared'
+
+    def __init__(self, max_batch=8, max_wait=0.02, timeout=5.0):
+        self.backend = None
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.running = False
+        self.thread = None
+        self.batches = 0
+        self.batched_images = 0
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return self.backend.names if self.backend is not None else {}
+
+    def start(self, backend):
+        """공유할 추론 엔진을 지정하고 작업자 스레드를 시작합니다. (처음 한 번만 적용)"""
+        with self._lock:
+            if self.running:
+                return
+            self.backend = backend
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="inference-server")
+            self.thread.daemon = True
+            self.thread.start()
+        print(f"공유 추론 서버 시작: 최대 배치 {self.max_batch}, 최대 대기 {self.max_wait * 1000:.0f}ms")
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.stop()
+        if self.backend is not None:
+            self.backend.close()
+
+    def predict(self, images, conf, imgsz=640):
+        """추론을 요청하고 결과를 기다립니다. (백엔드 predict()와 동일한 반환 형식)"""
+        request = InferenceRequest(images, conf, imgsz)
+        self.requests.put(request)
+        if not request.event.wait(self.timeout):
+            raise TimeoutError("공유 추론 서버 응답 시간 초과")
+        if request.error is not None:
+            raise request.error
+        return request.outputs
+
+    def __call__(self, images, conf, imgsz=640):
+        return self.predict(images, conf, imgsz)
+
+    def _collect(self):
+        """첫 요청 이후 마감 시간까지 요청을 모읍니다."""
+        try:
+            first = self.requests.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        count = len(first.images)
+        deadline = time.time() + self.max_wait
+        while count < self.max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            count += len(request.images)
+        return batch
+
+    def _run(self):
+        while self.running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # 입력 크기가 같은 요청끼리 묶어서 추론
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.imgsz, []).append(request)
+
+            for imgsz, requests in groups.items():
+                try:
+                    images = [image for request in requests for image in request.images]
+                    conf = min(request.conf for request in requests)
+                    outputs = self.backend.predict(images, conf, imgsz=imgsz)
+                    self.batches += 1
+                    self.batched_images += len(images)
+
+                    # 요청별로 결과 분배 (요청마다 다른 신뢰도 임계값 적용)
+                    offset = 0
+                    for request in requests:
+                        count = len(request.images)
+                        request.outputs = [output[output[:, 4] >= request.conf]
+                                           for output in outputs[offset:offset + count]]
+                        offset += count
+                except Exception as e:
+                    for request in requests:
+                        request.error = e
+                finally:
+                    for request in requests:
+                        request.event.set()
+
+    def get_stats(self):
+        return {
+            'batches': self.batches,
+            'avg_batch_size': round(self.batched_images / self.batches, 2) if self.batches else 0.0,
+            'pending': self.requests.qsize(),
+        }
@@ -0,0 +1,161 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """저해상도 프레임 차이로 장면 변화를 감지해 YOLO 추론 여부를 결정합니다.
+
+    축소한 흑백 프레임과 배경(이동 평균)의 차이에서 변화 영역 비율을 구하고,
+    비율이 임계값을 넘을 때만 추론을 허용합니다. 움직임이 멈춘 뒤에도 hold_seconds
+    동안은 추론을 계속하며, forced_refresh 초마다 한 번은 강제로 추론합니다.
+    """
+
+    def __init__(self, area_threshold=0.005, pixel_threshold=25, scale_width=160,
+                 forced_refresh=10.0, hold_seconds=1.0, learning_rate=0.05, exclusion_zones=None):
+        self.area_threshold = area_threshold  # 변화 영역 비율 임계값 (0.0 ~ 1.0)
+        self.pixel_threshold = pixel_threshold  # 픽셀 밝기 차이 임계값
+        self.scale_width = scale_width
+        self.forced_refresh = forced_refresh
+        self.hold_seconds = hold_seconds
+        self.learning_rate = learning_rate
+        # 움직임을 무시할 고정 영역 (TV, 창문 등) - 원본 프레임 기준 [x, y, w, h]
+        self.exclusion_zones = exclusion_zones or []
+        self._exclusion_mask = None
+        self._scale = 1.0
+
+        self.background = None
+        self.last_mask = None
+        self._buffers = {}  # 축소/흑백/차이 영상 버퍼 (프레임마다 재사용)
+        self.changed_ratio = 0.0
+        self.last_motion_time = 0.0
+        self.last_inference_time = 0.0
+        self.triggered = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_config(cls, settings):
+        return cls(area_threshold=settings.get('area_threshold', 0.005),
+                   pixel_threshold=settings.get('pixel_threshold', 25),
+                   scale_width=settings.get('scale_width', 160),
+                   forced_refresh=settings.get('forced_refresh', 10.0),
+                   hold_seconds=settings.get('hold_seconds', 1.0),
+                   learning_rate=settings.get('learning_rate', 0.05),
+                   exclusion_zones=settings.get('exclusion_zones', []))
+
+    def reset(self):
+        self.background = None
+        self.last_mask = None
+        self._buffers = {}
+        self._exclusion_mask = None
+
+    def _build_exclusion_mask(self, shape):
+        """축소 해상도 기준의 제외 영역 마스크를 만듭니다. (제외 영역은 0)"""
+        mask = np.full(shape, 255, dtype=np.uint8)
+        for x, y, w, h in self.exclusion_zones:
+            x0, y0 = int(x * self._scale), int(y * self._scale)
+            x1, y1 = int(np.ceil((x + w) * self._scale)), int(np.ceil((y + h) * self._scale))
+            mask[max(0, y0):max(0, y1), max(0, x0):max(0, x1)] = 0
+        return mask
+
+    def _compute_mask(self, frame):
+        height, width = frame.shape[:2]
+        self._scale = self.scale_width / float(width)
+        scale_height = max(1, int(height * self._scale))
+        shape = (scale_height, self.scale_width)
+        buffers = self._buffers
+        if buffers.get('shape') != shape:
+            buffers.clear()
+            buffers['shape'] = shape
+            buffers['small'] = np.empty(shape + frame.shape[2:], dtype=np.uint8)
+            for name in ('gray', 'blurred', 'background', 'diff', 'mask'):
+                buffers[name] = np.empty(shape, dtype=np.uint8)
+        cv2.resize(frame, (self.scale_width, scale_height), dst=buffers['small'], interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(buffers['small'], cv2.COLOR_BGR2GRAY, dst=buffers['gray'])
+        gray = cv2.GaussianBlur(buffers['gray'], (5, 5), 0, dst=buffers['blurred'])
+
+        # 해상도가 바뀌면 배경을 다시 학습
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self._exclusion_mask = self._build_exclusion_mask(gray.shape) if self.exclusion_zones else None
+            return None
+
+        cv2.convertScaleAbs(self.background, dst=buffers['background'])
+        diff = cv2.absdiff(gray, buffers['background'], dst=buffers['diff'])
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=buffers['mask'])
+        if self._exclusion_mask is not None:
+            cv2.bitwise_and(mask, self._exclusion_mask, dst=mask)
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        return mask
+
+    def should_detect(self, frame, now=None):
+        """이 프레임에 대해 전체 추론을 수행해야 하는지 반환합니다."""
+        now = now or time.time()
+        mask = self._compute_mask(frame)
+
+        if mask is None:
+            # 배경 학습 직후에는 한 번 추론
+            motion = True
+            self.changed_ratio = 1.0
+        else:
+            self.last_mask = mask
+            self.changed_ratio = cv2.countNonZero(mask) / float(mask.size)
+            motion = self.changed_ratio >= self.area_threshold
+
+        if motion:
+            self.last_motion_time = now
+
+        detect = (motion
+                  or now - self.last_motion_time < self.hold_seconds
+                  or now - self.last_inference_time >= self.forced_refresh)
+        if detect:
+            self.last_inference_time = now
+            self.triggered += 1
+        else:
+            self.skipped += 1
+        return detect
+
+    def motion_regions(self, min_area=0.001, merge_margin=4):
+        """마지막 변화 마스크에서 움직임 영역을 원본 프레임 좌표 [x, y, w, h] 목록으로 반환합니다."""
+        if self.last_mask is None or self.changed_ratio < self.area_threshold:
+            return []
+
+        # 가까운 변화 픽셀을 하나의 영역으로 묶기
+        mask = cv2.dilate(self.last_mask, None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_pixels = min_area * mask.size
+        rects = [list(cv2.boundingRect(contour)) for contour in contours
+                 if cv2.contourArea(contour) >= min_pixels]
+
+        # 겹치거나 가까운 영역 병합
+        merged = True
+        while merged and len(rects) > 1:
+            merged = False
+            for i in range(len(rects)):
+                for j in range(i + 1, len(rects)):
+                    ax, ay, aw, ah = rects[i]
+                    bx, by, bw, bh = rects[j]
+                    if (ax - merge_margin <= bx + bw and bx - merge_margin <= ax + aw and
+                            ay - merge_margin <= by + bh and by - merge_margin <= ay + ah):
+                        x0, y0 = min(ax, bx), min(ay, by)
+                        x1, y1 = max(ax + aw, bx + bw), max(ay + ah, by + bh)
+                        rects[i] = [x0, y0, x1 - x0, y1 - y0]
+                        del rects[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+
+        inv = 1.0 / self._scale
+        return [(int(x * inv), int(y * inv), int(np.ceil(w * inv)), int(np.ceil(h * inv)))
+                for x, y, w, h in rects]
+
+    def get_stats(self):
+        total = self.triggered + self.skipped
+        return {
+            'changed_ratio': round(self.changed_ratio, 4),
+            'triggered': self.triggered,
+            'skipped': self.skipped,
+            'skip_rate': round(self.skipped / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class NotificationJob:
+    """전송 대기 중인 알림 한 건"""
+
+    __slots__ = ('key', 'send', 'description', 'attempts', 'created', 'coalesced')
+
+    def __init__(self, key, send, description):
+        self.key = key
+        self.send = send
+        self.description = description or key
+        self.attempts = 0
+        self.created = time.time()
+        self.coalesced = 0
+
+
+class NotificationDispatcher:
+    """프레임 루프 밖에서 알림을 보내는 작업자 풀
+
+    submit()은 작업을 대기열에 넣고 바로 돌아가며, 네트워크 호출은 작업자 스레드가
+    수행합니다. 대기열 정책:
+    - 같은 key의 작업이 아직 대기 중이면 새 작업으로 교체합니다. (중복 알림 병합)
+    - 대기열이 가득 차면 가장 오래된 작업을 버립니다.
+    - send()가 예외를 던지면 지수 백오프(지터 포함)로 max_retries번까지 다시 시도합니다.
+      False를 반환하는 경우(쿨다운, 토큰 없음 등)는 재시도하지 않습니다.
+    """
+
+    def __init__(self, workers=2, max_queue=32, max_retries=3, backoff=1.0, max_backoff=30.0):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._pending = OrderedDict()  # key → 바로 보낼 작업 (오래된 순)
+        self._delayed = []  # (재시도 시각, 순번, 작업) 힙
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.threads = []
+        self.running = False
+        self.stats = {'submitted': 0, 'sent': 0, 'failed': 0, 'retried': 0, 'coalesced': 0, 'dropped': 0}
+
+    @classmethod
+    def from_config(cls, settings):
+        return cls(workers=settings.get('workers', 2),
+                   max_queue=settings.get('queue_size', 32),
+                   max_retries=settings.get('max_retries', 3),
+                   backoff=settings.get('retry_backoff', 1.0),
+                   max_backoff=settings.get('max_backoff', 30.0))
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"notification-{index}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=5):
+        """대기 중인 알림을 최대 timeout초 동안 보내고 작업자를 멈춥니다."""
+        deadline = time.time() + timeout
+        with self._condition:
+            while self._pending and time.time() < deadline:
+                self._condition.wait(0.1)
+            self.running = False
+            self._condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=max(0.0, deadline - time.time()))
+        self.threads = []
+
+    def submit(self, key, send, description=None):
+        """알림 작업을 대기열에 넣습니다. (블로킹 없음)
+
+        key가 같은 작업이 대기 중이면 최신 작업으로 교체합니다.
+        """
+        job = NotificationJob(key, send, description)
+        with self._condition:
+            self.stats['submitted'] += 1
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                job.coalesced = previous.coalesced + 1
+                self.stats['coalesced'] += 1
+            elif self._queued() >= self.max_queue:
+                self._drop_oldest()
+            self._pending[key] = job
+            self._condition.notify()
+        return True
+
+    def _queued(self):
+        return len(self._pending) + len(self._delayed)
+
+    def _drop_oldest(self):
+        # 재시도 대기 작업보다 아직 한 번도 보내지 않은 작업을 우선 보존
+        if self._delayed:
+            oldest = min(range(len(self._delayed)), key=lambda i: self._delayed[i][2].created)
+            job = self._delayed.pop(oldest)[2]
+            heapq.heapify(self._delayed)
+        else:
+            _, job = self._pending.popitem(last=False)
+        self.stats['dropped'] += 1
+        print(f"⚠️ 알림 대기열이 가득 차 버림: {job.description}")
+
+    def _next_job(self):
+        """보낼 작업을 기다려 꺼냅니다. 멈추면 None을 반환합니다."""
+        with self._condition:
+            while self.running:
+                now = time.time()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, job = heapq.heappop(self._delayed)
+                    if job.key in self._pending:
+                        # 재시도를 기다리는 동안 같은 key의 새 작업이 들어왔으면 그것만 보냄
+                        self.stats['coalesced'] += 1
+                        continue
+                    self._pending[job.key] = job
+                if self._pending:
+                    _, job = self._pending.popitem(last=False)
+                    self._condition.notify_all()  # stop()이 대기열이 비기를 기다리는 중일 수 있음
+                    return job
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._condition.wait(timeout)
+        return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            job.attempts += 1
+            try:
+                result = job.send()
+            except Exception as e:
+                self._retry(job, e)
+                continue
+            success = result[0] if isinstance(result, tuple) else bool(result)
+            with self._condition:
+                self.stats['sent' if success else 'failed'] += 1
+
+    def _retry(self, job, error):
+        if job.attempts > self.max_retries:
+            print(f"❌ 알림 전송 실패 ({job.attempts}회 시도): {job.description} - {error}")
+            with self._condition:
+                self.stats['failed'] += 1
+            return
+        delay = min(self.max_backoff, self.backoff * (2 ** (job.attempts - 1)))
+        delay *= random.uniform(0.8, 1.2)
+        print(f"⚠️ 알림 전송 오류, {delay:.1f}초 후 재시도 ({job.attempts}/{self.max_retries}): "
+              f"{job.description} - {error}")
+        with self._condition:
+            self.stats['retried'] += 1
+            heapq.heappush(self._delayed, (time.time() + delay, next(self._sequence), job))
+            self._condition.notify()
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self.stats)
+            stats['queued'] = len(self._pending)
+            stats['retrying'] = len(self._delayed)
+        return stats
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from frame_pipeline import LatestQueue
+
+
+class EncodedFrame:
+    """JPEG로 압축해 보관하는 프레임 한 장"""
+
+    __slots__ = ('timestamp', 'jpeg')
+
+    def __init__(self, timestamp, jpeg):
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+
+    def decode(self):
+        return cv2.imdecode(np.frombuffer(self.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class PreRollBuffer:
+    """항상 최근 몇 초의 프레임을 JPEG로 압축해 보관하는 사전 녹화 버퍼
+
+    녹화/이벤트가 시작되면 버퍼의 프레임을 먼저 기록해 트리거 이전 장면도 클립에
+    포함합니다. 원본 BGR 대신 JPEG 바이트만 보관하므로 640x480 기준 프레임당
+    약 30~60KB로 메모리 사용량이 작습니다. 인코딩은 별도 스레드에서 수행하며,
+    캡처 루프는 링 버퍼 슬롯 참조만 넘기고 바로 돌아갑니다.
+    """
+
+    def __init__(self, seconds=5.0, fps=15, quality=80, max_bytes=32 * 1024 * 1024):
+        self.seconds = seconds
+        self.interval = 1.0 / fps if fps else 0.0
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.total_bytes = 0
+        self.encoded = 0
+        self._last_push = 0.0
+        self._input = LatestQueue(maxsize=2, on_drop=lambda item: item[1].release())
+        self._lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, settings):
+        return cls(seconds=settings.get('preroll_seconds', 5.0),
+                   fps=settings.get('preroll_fps', 15),
+                   quality=settings.get('preroll_quality', 80),
+                   max_bytes=settings.get('preroll_max_mb', 32) * 1024 * 1024)
+
+    def start(self):
+        if self.running:
+            return
+        # stop() 직후 다시 시작하면 이전 스레드가 아직 running을 확인하기 전일 수 있으므로
+        # 끝날 때까지 기다린 뒤 새 스레드를 시작 (인코딩 스레드가 두 개가 되지 않도록)
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="preroll-encoder")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        """인코딩 스레드를 멈추고 대기 중인 프레임 슬롯을 반환합니다."""
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        self._input.clear()
+
+    def push(self, ref, timestamp):
+        """프레임 슬롯 참조를 인코딩 대기열에 넣습니다. (사전 녹화 fps에 맞춰 건너뜀)"""
+        if not self.running or timestamp - self._last_push < self.interval:
+            return
+        self._last_push = timestamp
+        self._input.put((timestamp, ref.retain()))
+
+    def _run(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while self.running:
+            item = self._input.get(timeout=0.5)
+            if item is None:
+                continue
+            timestamp, ref = item
+            try:
+                ok, buffer = cv2.imencode('.jpg', ref.array, params)
+            finally:
+                ref.release()
+            if not ok:
+                continue
+            self._append(EncodedFrame(timestamp, buffer.tobytes()))
+
+    def _append(self, frame):
+        with self._lock:
+            self.frames.append(frame)
+            self.total_bytes += len(frame.jpeg)
+            self.encoded += 1
+            # 보관 시간 또는 메모리 한도를 넘은 오래된 프레임 제거
+            while self.frames and (frame.timestamp - self.frames[0].timestamp > self.seconds
+                                   or self.total_bytes > self.max_bytes):
+                self.total_bytes -= len(self.frames.popleft().jpeg)
+
+    def snapshot(self, until=None):
+        """until 시각 이전(기본: 현재)까지 보관된 프레임 목록을 오래된 순으로 반환합니다."""
+        until = until or time.time()
+        with self._lock:
+            return [frame for frame in self.frames if frame.timestamp <= until]
+
+    def get_stats(self):
+        with self._lock:
+            count = len(self.frames)
+            span = self.frames[-1].timestamp - self.frames[0].timestamp if count > 1 else 0.0
+            return {
+                'frames': count,
+                'seconds': round(span, 1),
+                'kilobytes': self.total_bytes // 1024,
+                'encoded': self.encoded,
+            }
+
+
+def write_encoded_frames(writer, frames):
+    """JPEG 프레임 목록을 디코딩해 보관 당시의 캡처 시각으로 녹화 작성기에 기록합니다."""
+    for encoded in frames:
+        frame = encoded.decode()
+        if frame is not None:
+            writer.write(frame, encoded.timestamp)
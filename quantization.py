@@ -0,0 +1,143 @@
+import hashlib
+import os
+
+import cv2
+
+from inference_backends import letterbox_batch
+
+
+# 보정용/평가용 프레임을 겹치지 않게 나누는 구분 (benchmark_int8.py 평가는 EVALUATION_PART 사용)
+CALIBRATION_PART = 0
+EVALUATION_PART = 1
+
+
+def frame_part(path, index=0):
+    """파일 경로와 프레임 번호의 해시로 보정용/평가용 구분을 정합니다.
+
+    max_frames나 폴더의 다른 파일 수와 상관없이 같은 프레임은 항상 같은 쪽에 속하므로
+    보정과 평가에 서로 다른 프레임 수를 써도 두 집합이 겹치지 않습니다.
+    """
+    digest = hashlib.md5(f"{os.path.normpath(path)}:{index}".encode('utf-8')).digest()
+    return digest[0] & 1
+
+
+def spread(items, count):
+    """items에서 count개를 고른 간격으로 뽑습니다."""
+    if count <= 0:
+        return []
+    if len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+def select_video_frames(path, total, part, count):
+    """영상의 프레임 번호 중 part에 속한 것에서 count개를 고르게 뽑습니다."""
+    return spread([index for index in range(total) if frame_part(path, index) == part], count)
+
+
+def load_calibration_frames(dirs, max_frames=200, part=CALIBRATION_PART):
+    """로컬에 녹화/저장한 영상과 스냅샷에서 보정용 프레임을 고르게 뽑습니다.
+
+    스냅샷은 파일마다, 영상은 프레임마다 frame_part()로 먼저 나눈 뒤 그 안에서만
+    max_frames개를 고르므로 part가 다르면 max_frames가 달라도 겹치지 않습니다.
+    """
+    image_files, video_files = [], []
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                ext = os.path.splitext(name)[1].lower()
+                if ext in ('.jpg', '.jpeg', '.png'):
+                    image_files.append(path)
+                elif ext in ('.mp4', '.avi', '.mkv'):
+                    video_files.append(path)
+
+    frames = []
+
+    # 스냅샷 이미지
+    image_files = [path for path in image_files if frame_part(path) == part]
+    for path in spread(image_files, max_frames // 2):
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(image)
+
+    # 녹화 영상: 파일마다 이 part에 속한 프레임 중에서 균등한 간격으로 추출
+    if video_files:
+        per_video = max(1, (max_frames - len(frames)) // len(video_files))
+        for path in video_files:
+            cap = cv2.VideoCapture(path)
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video * 2
+            for index in select_video_frames(path, total, part, per_video):
+                if len(frames) >= max_frames:
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ret, frame = cap.read()
+                if ret and frame is not None:
+                    frames.append(frame)
+            cap.release()
+            if len(frames) >= max_frames:
+                break
+
+    return frames[:max_frames]
+
+
+class FrameCalibrationReader:
+    """onnxruntime 정적 양자화용 보정 데이터 공급기"""
+
+    def __init__(self, frames, input_name, imgsz=640):
+        self.frames = frames
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._index = 0
+
+    def get_next(self):
+        if self._index >= len(self.frames):
+            return None
+        tensor, _ = letterbox_batch([self.frames[self._index]], self.imgsz)
+        self._index += 1
+        return {self.input_name: tensor}
+
+    def rewind(self):
+        self._index = 0
+
+
+def quantize_model(onnx_path, calibration_dirs, max_frames=200, force=False):
+    """FP32 ONNX 모델을 로컬 프레임으로 보정해 INT8(QDQ) 모델을 만들고 경로를 반환합니다."""
+    int8_path = os.path.splitext(onnx_path)[0] + '_int8.onnx'
+    if not force and os.path.exists(int8_path) and os.path.getmtime(int8_path) >= os.path.getmtime(onnx_path):
+        return int8_path
+
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    frames = load_calibration_frames(calibration_dirs, max_frames)
+    if not frames:
+        raise RuntimeError(f"보정용 프레임이 없습니다. 다음 폴더에 녹화/스냅샷을 저장하세요: {calibration_dirs}")
+    print(f"INT8 양자화 보정 중: {len(frames)}개 프레임 사용")
+
+    input_name = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class _Reader(FrameCalibrationReader, CalibrationDataReader):
+        pass
+
+    quantize_static(onnx_path, int8_path, _Reader(frames, input_name),
+                    quant_format=QuantFormat.QDQ,
+                    per_channel=True,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8)
+
+    # 클래스 이름 등 ultralytics 메타데이터를 양자화 모델에 복사
+    fp32_model = onnx.load(onnx_path)
+    int8_model = onnx.load(int8_path)
+    existing = {prop.key for prop in int8_model.metadata_props}
+    for prop in fp32_model.metadata_props:
+        if prop.key not in existing:
+            int8_model.metadata_props.append(prop)
+    onnx.save(int8_model, int8_path)
+
+    print(f"INT8 모델 저장 완료: {int8_path}")
+    return int8_path
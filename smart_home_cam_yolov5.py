@@ -14,17 +14,33 @@ from flask import Flask, render_template, Response, request, redirect, url_for,
 from flask_socketio import SocketIO, emit
 from functools import wraps
 import base64
+import hashlib
+import hmac
+import secrets
 import io
 from PIL import Image
 import signal
 import sys
 import os
 import subprocess
-import gc
-import torch
-from ultralytics import YOLO
 from twilio.rest import Client
 from firebase_fcm import FirebaseFCM
+from frame_pipeline import FramePipeline, FramePacket, LatestQueue
+from frame_grabber import FrameGrabber
+from frame_ring import FrameRing
+from detections import Detections
+from event_recorder import EventRecorder
+from stream_broadcaster import StreamBroadcaster, StreamFrame
+from adaptive_quality import QUALITY_LEVELS, DEFAULT_LEVEL, is_remote_address, parse_trusted_proxies
+from motion_gate import MotionGate
+from preroll_buffer import PreRollBuffer, write_encoded_frames
+from video_writers import SegmentedClipWriter
+from inference_backends import MODEL_PATHS, create_backend
+from inference_server import InferenceServer
+from storage_manager import StorageManager
+from notification_dispatcher import NotificationDispatcher
+from incident_aggregator import IncidentAggregator
+from thumbnail_cache import ThumbnailCache
 import piexif
 import re
 
@@ -55,6 +71,24 @@ firebase_fcm = None
 # Cloudflare Tunnel 인스턴스
 cloudflare_tunnel = None
 
+# 알림 전송 작업자 풀 인스턴스
+notification_dispatcher = None
+
+# 알림 썸네일 메모리 캐시 인스턴스
+thumbnail_cache = None
+
+# 서명 URL용 비밀 키 파일 (설치마다 무작위로 생성, 외부에 공개하지 않음)
+URL_SIGNING_KEY_FILE = "url_signing.key"
+_url_signing_key = None
+_url_signing_lock = threading.Lock()
+
+# 녹화 세그먼트 색인 및 보관 정책 관리 인스턴스
+storage_manager = None
+
+# 홈캠 인스턴스 (home_cam: 기본 카메라, home_cams: 이름 → 카메라)
+home_cam = None
+home_cams = {}
+
 # 기본 인증 정보 (기본값)
 USERNAME = 'admin'
 PASSWORD = 'smarthome'
@@ -245,8 +279,8 @@ class TwilioSMS:
         except json.JSONDecodeError:
             print("설정 파일 형식이 잘못되었습니다. Twilio SMS 기능이 비활성화됩니다.")
             
-    def send_sms(self, message):
-        """SMS를 발송합니다."""
+    def send_sms(self, message, raise_errors=False):
+        """SMS를 발송합니다. (raise_errors: 발송 오류를 예외로 전달해 호출 측에서 재시도)"""
         if not self.enabled:
             return False, "Twilio SMS가 비활성화되어 있습니다."
             
@@ -265,35 +299,30 @@ class TwilioSMS:
             
         except Exception as e:
             print(f"SMS 발송 실패: {e}")
+            if raise_errors:
+                raise
             return False, str(e)
             
-    def send_detection_alert(self, detected_object, confidence):
-        """객체 감지 시 알림 SMS를 발송합니다."""
+    def send_incident_alert(self, incident, raise_errors=False):
+        """사건 알림 SMS를 발송합니다. (사건 사이에도 detection_cooldown 간격 유지)"""
         if not self.enabled or not self.send_on_detection:
             return False, "감지 알림이 비활성화되어 있습니다."
             
         current_time = time.time()
+        last_time = self.last_sms_time.get('incident', 0)
+        if current_time - last_time < self.detection_cooldown:
+            remaining_time = int(self.detection_cooldown - (current_time - last_time))
+            return False, f"쿨다운 중입니다. {remaining_time}초 후 재시도 가능합니다."
+            
+        first_seen = datetime.fromtimestamp(incident.first_seen).strftime("%Y-%m-%d %H:%M:%S")
+        message = (f"🏠 스마트홈 카메라 알림 ({incident.camera})\n\n감지된 객체: {incident.summary()}\n"
+                   f"시간: {first_seen} (지속 {incident.duration:.0f}초)\n\n확인: http://sonavi.duckdns.org:5000")
         
-        # 쿨다운 체크
-        if detected_object in self.last_sms_time:
-            time_diff = current_time - self.last_sms_time[detected_object]
-            if time_diff < self.detection_cooldown:
-                remaining_time = int(self.detection_cooldown - time_diff)
-                return False, f"쿨다운 중입니다. {remaining_time}초 후 재시도 가능합니다."
-                
-        # SMS 메시지 작성
-        current_time_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        message = f"🏠 스마트홈 카메라 알림\n\n감지된 객체: {detected_object}\n신뢰도: {confidence:.1%}\n시간: {current_time_str}\n\n확인: http://sonavi.duckdns.org:5000"
-        
-        # SMS 발송
-        success, result = self.send_sms(message)
-        
+        success, result = self.send_sms(message, raise_errors)
         if success:
-            self.last_sms_time[detected_object] = current_time
-            print(f"감지 알림 SMS 발송 완료: {detected_object} ({confidence:.1%})")
-            return True, result
-        else:
-            return False, result
+            self.last_sms_time['incident'] = current_time
+            print(f"사건 알림 SMS 발송 완료: {incident.summary()}")
+        return success, result
             
     def send_test_sms(self):
         """테스트 SMS를 발송합니다."""
@@ -422,6 +451,80 @@ def requires_auth(f):
         return f(*args, **kwargs)
     return decorated
 
+def get_url_signing_key():
+    """서명 URL용 비밀 키를 반환합니다. (처음 실행 시 무작위로 만들어 소유자만 읽을 수 있는 파일에 저장)"""
+    global _url_signing_key
+    with _url_signing_lock:
+        if _url_signing_key is None:
+            key = b''
+            if os.path.exists(URL_SIGNING_KEY_FILE):
+                with open(URL_SIGNING_KEY_FILE, 'rb') as f:
+                    key = f.read()
+            if len(key) < 32:
+                key = secrets.token_bytes(32)
+                fd = os.open(URL_SIGNING_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(key)
+            _url_signing_key = key
+        return _url_signing_key
+
+def sign_path(path, expires):
+    """인증 헤더를 보낼 수 없는 클라이언트(푸시 알림 이미지 등)에 줄 경로 서명을 만듭니다. (만료 시각 포함)"""
+    payload = f"{path}\n{int(expires)}".encode()
+    return hmac.new(get_url_signing_key(), payload, hashlib.sha256).hexdigest()
+
+def signed_url(path, ttl):
+    """ttl초 동안만 유효한 서명 경로(?exp=...&sig=...)를 만듭니다."""
+    expires = int(time.time() + ttl)
+    return f"{path}?exp={expires}&sig={sign_path(path, expires)}"
+
+# 만료되지 않은 서명 URL(?exp=&sig=) 또는 기본 인증을 허용하는 데코레이터
+def requires_auth_or_signature(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        signature = request.args.get('sig', '')
+        expires = request.args.get('exp', '')
+        if signature and expires.isdigit() and int(expires) >= time.time() and \
+                hmac.compare_digest(signature, sign_path(request.path, int(expires))):
+            return f(*args, **kwargs)
+        return requires_auth(f)(*args, **kwargs)
+    return decorated
+
+def public_base_url():
+    """외부(푸시 알림 수신 기기)에서 접근할 수 있는 서버 주소를 반환합니다."""
+    if cloudflare_tunnel and cloudflare_tunnel.tunnel_url:
+        return cloudflare_tunnel.tunnel_url.rstrip('/')
+    if duckdns_updater and duckdns_updater.enabled and duckdns_updater.domain:
+        return f"http://{duckdns_updater.domain}.duckdns.org:5000"
+    return "http://localhost:5000"
+
+def get_camera():
+    """요청의 ?camera=이름 파라미터에 해당하는 카메라를 반환합니다. (없으면 기본 카메라)"""
+    name = request.args.get('camera')
+    if name:
+        return home_cams.get(name)
+    return home_cam
+
+def load_camera_settings():
+    """config.json의 cameras 목록과 공유 추론 서버 설정을 읽습니다. (없으면 카메라 1대)"""
+    cameras, server_settings = [], {}
+    try:
+        with open('config.json', 'r') as f:
+            config = json.load(f)
+            cameras = config.get('cameras', [])
+            server_settings = config.get('inference_server_settings', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return cameras or [{'id': 1, 'name': 'main', 'model_type': 'nano'}], server_settings
+
+def load_settings(section):
+    """config.json의 설정 항목 하나(storage_settings, notification_settings 등)를 읽습니다."""
+    try:
+        with open('config.json', 'r') as f:
+            return json.load(f).get(section, {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
 def signal_handler(sig, frame):
     """시그널 핸들러 - Ctrl+C 감지 시 호출됨"""
     print("\nCtrl+C가 감지되었습니다. 프로그램 종료 중...")
@@ -444,8 +547,20 @@ def cleanup_and_exit():
             duckdns_updater.stop()
         
         # 홈캠 인스턴스 정지
-        if 'home_cam' in globals() and home_cam is not None:
-            home_cam.stop()
+        for cam in home_cams.values():
+            cam.stop()
+        
+        # 추론 엔진 정리 (별도 추론 프로세스와 공유 메모리 해제)
+        for model in {cam.model for cam in home_cams.values() if cam.model is not None}:
+            model.close()
+        
+        # 보관 정책 스레드 중지
+        if storage_manager is not None:
+            storage_manager.stop()
+        
+        # 대기 중인 알림 전송 후 알림 작업자 중지
+        if notification_dispatcher is not None:
+            notification_dispatcher.stop()
             
         # 열린 창 닫기
         cv2.destroyAllWindows()
@@ -462,40 +577,135 @@ def cleanup_and_exit():
     os._exit(0)  # 즉시 종료
 
 class SmartHomeCam:
-    def __init__(self, camera_id=0, model_type='nano'):
+    def __init__(self, camera_id=0, model_type='nano', name='main', inference_server=None):
         # 카메라 설정
         self.camera_id = camera_id  # 인스턴스 생성 시 카메라 ID 설정
+        self.name = name  # 다중 카메라 모드에서 카메라를 구분하는 이름
+        self.file_tag = f"_{name}" if inference_server is not None else ''  # 다중 카메라 파일명 구분자
+        self.allow_camera_fallback = inference_server is None  # 다른 카메라 ID로 자동 전환 허용
+        self.inference_server = inference_server  # 여러 카메라가 공유하는 추론 서버
         self.cap = None
         self.running = True
         self.camera_initialized = False
         
         # YOLO 모델 설정
         self.model_type = model_type  # 'nano', 'small', 'medium', 'large'
-        self.model = None
+        self.model = None  # 추론 엔진 (inference_backends.InferenceBackend)
+        self.inference_settings = {}
         self.classes = []
         self.colors = np.random.uniform(0, 255, size=(80, 3))
+        self.class_colors = []  # 클래스 ID → BGR 색상 튜플
+        self.class_labels = []  # 클래스 ID → 라벨 문자열
         self.detection_threshold = 0.7
         
         # 객체 감지 결과 큐
         self.detection_queue = queue.Queue()
         
-        # 마지막 알림 시간
-        self.last_notification_time = {}
+        # 감지를 사건 단위로 묶어 알림을 한 번만 보내는 집계기 (설정 로드 후 생성)
+        self.notification_settings = {}
+        self.incidents = None
         
         # 웹 스트리밍을 위한 변수
         self.frame = None
-        self.detections = []
+        self.detections = Detections.empty()
         
         # 녹화 관련 변수
         self.is_recording = False
-        self.video_writer = None
         self.recording_start_time = None
+        self.recording_segments = []  # 마지막 녹화의 세그먼트 파일 목록
         self.recording_thread = None
-        self.recording_frames = queue.Queue(maxsize=300)  # 최대 300프레임 버퍼 (약 10초)
+        self.recording_frames = None  # 녹화 대기 프레임 (timestamp, FrameRef) 큐 - 녹화 전용 링 버퍼의 슬롯 참조
+        self.recording_ring = None  # 녹화 대기 프레임을 복사해 두는 전용 링 버퍼 (공유 링 버퍼 슬롯을 잡지 않음)
+        self.recording_buffer_frames = 90  # 인코더가 밀릴 때 녹화 대기열에 보관할 최대 프레임 수
+        self.recording_dropped = 0  # 이번 녹화에서 대기열이 가득 차 버린 프레임 수
+        self.preroll = None  # 녹화 시작 이전 장면을 JPEG로 보관하는 사전 녹화 버퍼 (None이면 비활성화)
+        self.event_recording = True  # 감시 대상이 나타나면 자동으로 이벤트 클립 녹화
+        self.recording_settings = {}
+        self.segment_seconds = 60.0
+        self.event_recorder = None
+        self.event_queue_frames = 4  # 이벤트 녹화기 작성 대기열 크기 (공유 링 버퍼 슬롯 사용)
+        
+        # 파이프라인 모드 관련 변수
+        self.pipeline_enabled = False
+        self.pipeline = None
+        self.frame_seq = 0
+        self.detection_interval = 0.08  # 객체 감지 간격 (초)
+        self._last_detection_time = 0
+        
+        # 장면 변화가 있을 때만 추론하는 움직임 게이트 (None이면 비활성화)
+        self.motion_gate = None
+        
+        # 움직임 영역만 잘라 추론하는 ROI 모드
+        self.roi_inference = False
+        self.roi_padding = 32  # 움직임 영역 주변 여유 (픽셀)
+        self.roi_min_size = 128  # 잘라낼 영역의 최소 크기 (픽셀)
+        self.roi_max_coverage = 0.6  # 잘라낸 영역 합이 이 비율을 넘으면 전체 프레임 추론
+        self.exclusion_zones = []  # 감지를 무시할 고정 영역 [x, y, w, h]
+        
+        # 스트림 전송 방식 ('binary': JPEG 바이너리 첨부, 'base64': 기존 JSON 문자열)
+        self.stream_transport = 'binary'
+        self.mjpeg_max_fps = 15  # /video_feed 연결당 최대 프레임 속도
+        self.target_latency_ms = 300  # 적응형 화질 제어의 목표 전송 지연
+        self.trusted_proxies = []  # 전달 헤더를 믿을 프록시 대역 (로컬 터널은 항상 신뢰)
+        
+        # 최신 프레임 읽기 스레드
+        self.grabber = None
+        self.last_frame_seq = 0
+        self.last_frame_timestamp = 0.0
+        
+        # 캡처한 프레임을 모든 소비자가 공유하는 링 버퍼 (추론/인코딩/녹화가 슬롯을 참조)
+        self.frame_ring_slots = 16
+        self._display_buffer = None  # 감지 박스를 그릴 화면 표시용 버퍼 (재사용)
+        self._resize_buffers = {}  # 화질 단계별 스트림 축소 버퍼 (재사용)
+        self._encode_params = {level: [cv2.IMWRITE_JPEG_QUALITY, quality]
+                               for level, (_, _, quality, _) in enumerate(QUALITY_LEVELS)}
         
         # 설정 파일 로드
         self.load_config()
         
+        self.incidents = IncidentAggregator.from_config(self.notification_settings, camera=self.name,
+                                                        idle_timeout=self.notification_cooldown,
+                                                        on_alert=self._on_incident)
+        
+        # 소비자들이 동시에 잡을 수 있는 슬롯 수보다 링 버퍼가 작으면 캡처가 멈추므로 그 이상으로 생성
+        self.frame_ring_slots = max(self.frame_ring_slots, self._frame_ring_budget())
+        self.frame_ring = FrameRing(self.frame_ring_slots)
+        # 수동 녹화는 인코딩이 밀려도 실시간 스트림을 막지 않도록 프레임을 전용 링 버퍼에 복사해 보관
+        self.recording_ring = FrameRing(self.recording_buffer_frames)
+        self.recording_frames = queue.Queue(maxsize=self.recording_buffer_frames)
+        
+        # 감시 대상 감지 시 사전 녹화 장면부터 자동으로 녹화하는 이벤트 녹화기
+        if self.event_recording:
+            self.event_recorder = EventRecorder.from_config(RECORDINGS_DIR, self.recording_settings,
+                                                            preroll=self.preroll,
+                                                            queue_size=self.event_queue_frames,
+                                                            file_tag=self.file_tag,
+                                                            segment_seconds=self.segment_seconds,
+                                                            storage=storage_manager,
+                                                            camera=self.name,
+                                                            min_post_roll=self._min_post_roll())
+        
+        # 시청자별 전송 슬롯을 관리하는 스트림 방송기 (재시작해도 연결된 시청자 유지)
+        self.broadcaster = StreamBroadcaster(socketio, transport=self.stream_transport,
+                                             target_latency=self.target_latency_ms / 1000.0)
+        
+    def _frame_ring_budget(self):
+        """공유 링 버퍼 슬롯을 동시에 잡을 수 있는 소비자별 최대 개수의 합을 반환합니다."""
+        budget = 2  # 캡처 스레드: 최신 프레임 + 다음 프레임을 읽는 슬롯
+        # 파이프라인: 단계 사이 큐(1 + 1 + 2) + 단계마다 처리 중인 패킷(4) / 단일 루프: 처리 중인 프레임
+        budget += 8 if self.pipeline_enabled else 1
+        if self.preroll is not None:
+            budget += 3  # 인코딩 대기열(2) + 인코딩 중인 프레임
+        if self.event_recording:
+            budget += self.event_queue_frames + 1  # 작성 대기열 + 기록 중인 프레임
+        return budget
+
+    def _min_post_roll(self):
+        """움직임 게이트의 강제 추론 주기보다 여유 있게 긴 최소 post-roll(초)"""
+        if self.motion_gate is None:
+            return 0.0
+        return self.motion_gate.forced_refresh * 1.5
+
     def load_config(self):
         """설정 파일을 로드합니다."""
         try:
@@ -503,16 +713,43 @@ class SmartHomeCam:
                 config = json.load(f)
                 self.notification_cooldown = config.get('notification_cooldown', 30)
                 self.special_objects = config.get('special_objects', ['person', 'dog', 'cat'])
+                self.notification_settings = config.get('notification_settings', {})
+                self.inference_settings = config.get('inference_settings', {})
+                pipeline_settings = config.get('pipeline_settings', {})
+                self.pipeline_enabled = pipeline_settings.get('enabled', False)
+                self.detection_interval = pipeline_settings.get('detection_interval', 0.08)
+                self.frame_ring_slots = max(8, pipeline_settings.get('frame_ring_slots', 16))
+                motion_settings = config.get('motion_settings', {})
+                if motion_settings.get('enabled', False):
+                    self.motion_gate = MotionGate.from_config(motion_settings)
+                self.roi_inference = motion_settings.get('roi_inference', False)
+                self.roi_padding = motion_settings.get('roi_padding', 32)
+                self.roi_min_size = motion_settings.get('roi_min_size', 128)
+                self.roi_max_coverage = motion_settings.get('roi_max_coverage', 0.6)
+                self.exclusion_zones = motion_settings.get('exclusion_zones', [])
+                recording_settings = config.get('recording_settings', {})
+                self.recording_settings = recording_settings
+                self.recording_buffer_frames = max(1, recording_settings.get('buffer_frames', 90))
+                self.event_recording = recording_settings.get('event_recording', True)
+                if recording_settings.get('preroll_enabled', True):
+                    self.preroll = PreRollBuffer.from_config(recording_settings)
+                self.segment_seconds = config.get('storage_settings', {}).get('segment_seconds', 60.0)
+                streaming_settings = config.get('streaming_settings', {})
+                self.stream_transport = streaming_settings.get('transport', 'binary')
+                self.mjpeg_max_fps = streaming_settings.get('mjpeg_max_fps', 15)
+                self.target_latency_ms = streaming_settings.get('target_latency_ms', 300)
+                self.trusted_proxies = parse_trusted_proxies(streaming_settings.get('trusted_proxies', []))
         except FileNotFoundError:
             self.notification_cooldown = 30
             self.special_objects = ['person', 'dog', 'cat']
+            self.preroll = PreRollBuffer()
             
     def initialize_camera(self):
         """카메라를 초기화합니다."""
         try:
             # 기존 카메라가 열려있으면 해제
             if self.cap is not None:
-                self.cap.release()
+                self._release_camera()
                 time.sleep(1)  # 카메라 해제 후 잠시 대기
                 
             print(f"카메라 {self.camera_id} 초기화 시도 중...")
@@ -520,7 +757,7 @@ class SmartHomeCam:
             # 카메라 초기화 시도 (DirectShow 백엔드 사용)
             self.cap = cv2.VideoCapture(self.camera_id, cv2.CAP_DSHOW)
             
-            if not self.cap.isOpened():
+            if not self.cap.isOpened() and self.allow_camera_fallback:
                 print(f"카메라 {self.camera_id}를 열 수 없습니다. 다른 카메라를 시도합니다...")
                 # 다른 카메라 ID 시도
                 for i in range(3):  # 0, 1, 2 시도
@@ -549,6 +786,11 @@ class SmartHomeCam:
                 if ret and frame is not None and frame.size > 0:
                     print("카메라 초기화 성공!")
                     self.camera_initialized = True
+                    
+                    # 최신 프레임만 보관하는 읽기 스레드 시작
+                    self.grabber = FrameGrabber(self.cap, self.frame_ring)
+                    self.last_frame_seq = 0
+                    self.grabber.start()
                     return True
                 time.sleep(0.1)
             
@@ -563,17 +805,16 @@ class SmartHomeCam:
     def load_yolo_model(self):
         """YOLOv5 모델을 로드합니다."""
         try:
-            # 모델 종류에 따라 다른 파일 선택
-            if self.model_type == 'nano':
-                model_path = "object_detection_yolov5/yolov5n.pt"
-            elif self.model_type == 'small':
-                model_path = "object_detection_yolov5/yolov5s.pt"
-            elif self.model_type == 'medium':
-                model_path = "object_detection_yolov5/yolov5m.pt"
-            elif self.model_type == 'large':
-                model_path = "object_detection_yolov5/yolov5l.pt"
-            else:
-                model_path = "object_detection_yolov5/yolov5n.pt"  # 기본값
+            # 다른 카메라가 이미 로드한 공유 모델이 있으면 그대로 사용
+            if self.inference_server is not None and self.inference_server.backend is not None:
+                self.model = self.inference_server
+                self.classes = self.model.names
+                self._build_class_tables()
+                print(f"[{self.name}] 공유 추론 서버 사용")
+                return True
+                
+            # 모델 종류에 따라 다른 파일 선택 (기본값: nano)
+            model_path = MODEL_PATHS.get(self.model_type, MODEL_PATHS['nano'])
                 
             # 모델이 없으면 다운로드 안내
             if not os.path.exists(model_path):
@@ -587,9 +828,21 @@ class SmartHomeCam:
                 print(f"다운로드한 파일을 {model_path}에 저장하세요.")
                 return False
                 
+            # 재시작 시 이전 엔진 정리
+            if self.model is not None and self.model is not self.inference_server:
+                self.model.close()
+                self.model = None
+            
             print(f"YOLOv5 모델 로드 중: {model_path}")
-            self.model = YOLO(model_path)
+            backend = create_backend(model_path, self.inference_settings)
+            if self.inference_server is not None:
+                # 다중 카메라: 모델은 한 번만 로드하고 추론 서버를 통해 공유
+                self.inference_server.start(backend)
+                self.model = self.inference_server
+            else:
+                self.model = backend
             self.classes = self.model.names
+            self._build_class_tables()
             print(f"YOLO 모델 로드 완료. {len(self.classes)}개의 클래스 감지 가능")
             return True
             
@@ -599,113 +852,156 @@ class SmartHomeCam:
             traceback.print_exc()
             return False
             
-    def detect_objects(self, frame):
-        """YOLOv5를 사용하여 프레임에서 객체를 감지합니다."""
+    def _build_class_tables(self):
+        """클래스 ID로 바로 찾을 수 있는 색상/라벨 테이블을 미리 만듭니다."""
+        num_classes = max(self.classes.keys()) + 1 if self.classes else 0
+        if len(self.colors) < num_classes:
+            self.colors = np.random.uniform(0, 255, size=(num_classes, 3))
+        self.class_colors = [tuple(int(c) for c in color) for color in self.colors[:num_classes]]
+        self.class_labels = [self.classes.get(class_id, str(class_id)) for class_id in range(num_classes)]
+            
+    def _roi_crops(self, frame, regions, stride=32):
+        """움직임 영역을 여유 공간을 두고 모델 stride 배수 크기로 맞춘 잘라내기 영역 목록을 만듭니다."""
+        frame_h, frame_w = frame.shape[:2]
+        crops = []
+        for x, y, w, h in regions:
+            cx, cy = x + w / 2.0, y + h / 2.0
+            # 여유 공간 추가 및 최소 크기 보장
+            crop_w = max(w + self.roi_padding * 2, self.roi_min_size)
+            crop_h = max(h + self.roi_padding * 2, self.roi_min_size)
+            # stride 배수로 올림
+            crop_w = min(int(np.ceil(crop_w / stride) * stride), frame_w)
+            crop_h = min(int(np.ceil(crop_h / stride) * stride), frame_h)
+            # 중심을 유지하면서 프레임 안으로 이동
+            x0 = int(min(max(0, cx - crop_w / 2.0), frame_w - crop_w))
+            y0 = int(min(max(0, cy - crop_h / 2.0), frame_h - crop_h))
+            crops.append((x0, y0, crop_w, crop_h))
+        return crops
+        
+    def detect_objects(self, frame, regions=None):
+        """YOLOv5를 사용하여 프레임에서 객체를 감지합니다.
+        
+        regions가 주어지면 해당 움직임 영역만 잘라 한 번에 배치 추론하고
+        결과를 원본 프레임 좌표로 되돌립니다.
+        """
         try:
             if frame is None or frame.size == 0:
                 print("빈 프레임입니다. 객체 감지를 건너뜁니다.")
-                return []
+                return Detections.empty()
                 
             if self.model is None:
                 print("YOLOv5 모델이 로드되지 않았습니다.")
-                return []
+                return Detections.empty()
             
-            # YOLOv5로 객체 감지 수행
-            results = self.model(frame, conf=self.detection_threshold)
+            if regions:
+                crops = self._roi_crops(frame, regions)
+                # 잘라낸 영역이 프레임 대부분을 차지하면 전체 프레임 추론이 더 저렴
+                frame_area = frame.shape[0] * frame.shape[1]
+                if sum(w * h for _, _, w, h in crops) <= frame_area * self.roi_max_coverage:
+                    return self._detect_regions(frame, crops)
             
-            # 결과 파싱
-            detections = []
+            # YOLOv5로 객체 감지 수행 (결과는 엔진과 무관하게 (N, 6) numpy 배열)
+            outputs = self.model.predict([frame], self.detection_threshold)
             
-            # 최신 ultralytics 버전에 맞게 결과 처리 방식 변경
-            for result in results:
-                # 각 결과의 박스, 클래스, 신뢰도 값 가져오기
-                boxes = result.boxes
-                
-                for box in boxes:
-                    # 박스 좌표 가져오기 (x1, y1, x2, y2)
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    
-                    # 정수형으로 변환
-                    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                    
-                    # 클래스 인덱스와 이름
-                    class_id = int(box.cls)
-                    label = self.model.names[class_id]
-                    confidence = float(box.conf)
-                    
-                    # 시각화를 위한 좌표 계산 (x, y, w, h 형식으로 변환)
-                    x = x1
-                    y = y1
-                    w = x2 - x1
-                    h = y2 - y1
-                    
-                    # 감지 결과 저장
-                    detections.append((label, confidence, (x, y, w, h)))
-                
-            return detections
+            return Detections.from_array(outputs[0], self.model.names)
             
         except Exception as e:
             print(f"객체 감지 중 오류 발생: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return Detections.empty()
 
-    def process_notifications(self, detections):
-        """감지된 객체에 대한 알림을 처리합니다."""
-        global twilio_sms, firebase_fcm, duckdns_updater
-        
-        if not detections:
+    def _detect_regions(self, frame, crops):
+        """잘라낸 영역들을 한 번에 배치 추론하고 박스를 원본 프레임 좌표로 변환합니다."""
+        images = [frame[y:y + h, x:x + w] for x, y, w, h in crops]
+        # 가장 큰 영역 크기로 추론 (작은 영역을 640으로 확대하지 않음)
+        imgsz = max(max(w, h) for _, _, w, h in crops)
+        outputs = self.model.predict(images, self.detection_threshold, imgsz=imgsz)
+        
+        parsed = []
+        for (x, y, _, _), data in zip(crops, outputs):
+            if len(data):
+                data[:, [0, 2]] += x
+                data[:, [1, 3]] += y
+            parsed.append(Detections.from_array(data, self.model.names))
+        return Detections.concatenate(parsed, self.model.names)
+        
+    def _filter_exclusion_zones(self, detections):
+        """중심이 제외 영역(TV, 창문 등) 안에 있는 감지 결과를 제거합니다."""
+        if not detections or not self.exclusion_zones:
+            return detections
+        centers = detections.centers()
+        keep = np.ones(len(detections), dtype=bool)
+        for x, y, w, h in self.exclusion_zones:
+            inside = ((centers[:, 0] >= x) & (centers[:, 0] < x + w) &
+                      (centers[:, 1] >= y) & (centers[:, 1] < y + h))
+            keep &= ~inside
+        return detections.select(keep)
+        
+    def process_notifications(self, detections, frame=None):
+        """감시 대상 감지를 사건 집계기에 넘깁니다. (알림은 사건마다 한 번, 전송은 알림 작업자가 수행)"""
+        watched = [detection for detection in detections if detection[0] in self.special_objects] \
+            if detections else []
+        self.incidents.observe(watched, frame, self.last_frame_timestamp or time.time())
+
+    def _on_incident(self, incident):
+        """사건 알림을 알림 작업자에 넘깁니다. (프레임 루프에서 호출됨)
+
+        작업 키는 카메라 단위이므로 같은 카메라의 알림이 아직 전송 대기 중이면 최신 사건 하나로 합쳐집니다.
+        """
+        print(f"🔔 감지 알림: [{incident.camera}] {incident.summary()}")
+        
+        # Firebase FCM 알림 발송 (우선순위)
+        if firebase_fcm:
+            self._dispatch_notification(f"fcm:{incident.camera}", lambda: self._send_fcm_alert(incident),
+                                        f"FCM {incident.id}")
+        
+        # Twilio SMS 알림 발송 (백업용)
+        if twilio_sms and twilio_sms.enabled:
+            self._dispatch_notification(f"sms:{incident.camera}", lambda: self._send_sms_alert(incident),
+                                        f"SMS {incident.id}")
+
+    def _dispatch_notification(self, key, send, description):
+        """알림 작업자 풀에 전송 작업을 넣습니다. (작업자가 없으면 바로 전송)"""
+        if notification_dispatcher is not None:
+            notification_dispatcher.submit(key, send, description)
             return
-            
-        current_time = time.time()
-        
-        for label, confidence, _ in detections:
-            if label in self.special_objects:
-                if label not in self.last_notification_time or \
-                   (current_time - self.last_notification_time[label]) > self.notification_cooldown:
-                    
-                    # Firebase FCM 알림 발송 (우선순위)
-                    if firebase_fcm:
-                        try:
-                            # DuckDNS URL 생성
-                            duckdns_url = "http://localhost:5000"
-                            if duckdns_updater and duckdns_updater.enabled and duckdns_updater.domain:
-                                duckdns_url = f"http://{duckdns_updater.domain}.duckdns.org:5000"
-                            
-                            # 감지된 객체 정보 구성
-                            detected_objects = [{'name': label, 'confidence': confidence}]
-                            
-                            # FCM 알림 발송 (새로운 설정으로 재시도)
-                            try:
-                                success = firebase_fcm.send_detection_alert(
-                                    detected_objects, 
-                                    confidence,
-                                    duckdns_url
-                                )
-                                
-                                if success:
-                                    print(f"📱 FCM 알림 발송 완료: {label} ({confidence:.1f}%)")
-                                else:
-                                    print(f"⚠️ FCM 알림 발송 실패 (토큰 없거나 쿨다운): {label}")
-                            except Exception as fcm_error:
-                                print(f"FCM 발송 중 오류: {fcm_error}")
-                
-                            # 콘솔 출력
-                            print(f"🔔 감지 알림: {label} ({confidence:.1f}%)")
-                                
-                        except Exception as e:
-                            print(f"FCM 발송 중 오류: {e}")
-            
-                    # Twilio SMS 알림 발송 (백업용)
-                    if twilio_sms and twilio_sms.enabled:
-                        success, result = twilio_sms.send_detection_alert(label, confidence)
-                        if success:
-                            print(f"📱 SMS 알림 발송 성공: {label}")
-                        else:
-                            print(f"❌ SMS 알림 발송 실패: {result}")
-                    
-                    # 감지 시간 기록
-                    self.last_notification_time[label] = current_time
+        try:
+            send()
+        except Exception as e:
+            print(f"{description} 알림 발송 중 오류: {e}")
+
+    def _send_fcm_alert(self, incident):
+        """FCM 사건 알림을 보냅니다. (알림 작업자 스레드에서 실행, 일시적 오류는 재시도)"""
+        # DuckDNS URL 생성
+        duckdns_url = "http://localhost:5000"
+        if duckdns_updater and duckdns_updater.enabled and duckdns_updater.domain:
+            duckdns_url = f"http://{duckdns_updater.domain}.duckdns.org:5000"
+        
+        # 썸네일은 작업자 스레드에서 한 번만 인코딩해 캐시에 넣고 서명된 URL로 전달
+        image_url = None
+        if thumbnail_cache is not None:
+            jpeg = incident.thumbnail_jpeg(self.incidents.thumbnail_quality)
+            if jpeg:
+                thumbnail_cache.put(incident.id, jpeg)
+                path = f"/thumbnails/{incident.id}.jpg"
+                image_url = public_base_url() + signed_url(path, thumbnail_cache.ttl)
+        
+        success = firebase_fcm.send_incident_alert(incident, duckdns_url, image_url=image_url, raise_errors=True)
+        if success:
+            print(f"📱 FCM 알림 발송 완료: {incident.summary()}")
+        else:
+            print(f"⚠️ FCM 알림 발송 실패 (등록된 토큰 없음): {incident.id}")
+        return success
+
+    def _send_sms_alert(self, incident):
+        """Twilio 사건 SMS를 보냅니다. (알림 작업자 스레드에서 실행, 발송 오류는 재시도)"""
+        success, result = twilio_sms.send_incident_alert(incident, raise_errors=True)
+        if success:
+            print(f"📱 SMS 알림 발송 성공: {incident.id}")
+        else:
+            print(f"❌ SMS 알림 발송 실패: {result}")
+        return success
 
     
     def stop(self):
@@ -713,175 +1009,248 @@ class SmartHomeCam:
         print("카메라 종료 중...")
         self.running = False
         
-        # 카메라 자원 해제
+        # 파이프라인 중지
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        
+        if self.preroll is not None:
+            self.preroll.stop()
+        if self.event_recorder is not None:
+            self.event_recorder.stop()
+        
+        # 프레임 읽기 스레드 중지 및 카메라 자원 해제
+        self._release_camera()
+            
+        # 메모리 자원 정리
+        self.frame = None
+        self.detections = Detections.empty()
+        
+        print("카메라 종료 완료")
+        
+    def _release_camera(self):
+        """프레임 읽기 스레드를 멈추고 카메라를 해제합니다."""
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
         if self.cap is not None:
             try:
                 self.cap.release()
             except:
                 pass
             self.cap = None
-            
-        # 메모리 자원 정리
-        self.frame = None
-        self.detections = []
+        self.camera_initialized = False
         
-        print("카메라 종료 완료")
+    def _read_camera_frame(self):
+        """프레임 읽기 스레드에서 새 프레임의 링 버퍼 참조(FrameRef)를 가져옵니다.
+
+        반환된 참조는 사용 후 release()해야 합니다. 실패 시 재초기화를 처리하고 None을 반환합니다.
+        """
+        # 카메라가 없거나 열려있지 않으면 재초기화
+        if not self.cap or not self.cap.isOpened() or self.grabber is None or not self.grabber.is_alive():
+            print("카메라가 열려있지 않습니다. 재초기화 중...")
+            if not self.initialize_camera():
+                print("카메라 초기화 실패, 2초 후 재시도")
+                time.sleep(2)
+                return None
+            time.sleep(0.5)
+            return None
+        
+        # 새 프레임 대기 (최대 1초)
+        seq, timestamp, ref = self.grabber.wait_for_frame(self.last_frame_seq, timeout=1.0)
+        
+        if ref is None:
+            # 너무 오랜 시간 동안 유효한 프레임이 없으면 카메라 재초기화
+            if self.grabber.seconds_since_last_frame() > 5:  # 5초 이상 프레임이 없으면
+                print("장시간 유효한 프레임이 없습니다. 카메라 재초기화 중...")
+                self._release_camera()
+                
+                # 재초기화 시도
+                if not self.initialize_camera():
+                    print("카메라 재초기화 실패")
+                    time.sleep(2)
+            return None
+        
+        self.last_frame_seq = seq
+        self.last_frame_timestamp = timestamp
+        return ref
+        
+        
+    def _run_detection(self, frame):
+        """객체 감지와 알림 처리를 수행하고 결과를 저장합니다."""
+        # 장면 변화가 없으면 추론을 건너뛰고 이전 결과 유지
+        regions = None
+        if self.motion_gate is not None:
+            if not self.motion_gate.should_detect(frame):
+                # 추론은 건너뛰어도 사건 종료/알림 시간은 진행
+                self.process_notifications(None)
+                return self.detections
+            # ROI 모드: 움직임 영역만 추론 (움직임 없이 강제 갱신된 경우 전체 프레임)
+            if self.roi_inference:
+                regions = self.motion_gate.motion_regions()
+        
+        detections = self._filter_exclusion_zones(self.detect_objects(frame, regions))
+        
+        # 감시 대상이 보이면 이벤트 클립을 시작하거나 연장
+        if detections and self.event_recorder is not None:
+            watched = {label for label in detections.labels() if label in self.special_objects}
+            if watched:
+                self.event_recorder.trigger(watched, self.last_frame_timestamp)
+        
+        # 알림 처리 (감지가 없어도 사건 종료 시간 확인을 위해 호출)
+        self.process_notifications(detections, frame)
+        
+        # 결과 저장
+        self.detections = detections
+        return detections
+        
+    def _draw_detections(self, display_frame, detections):
+        """프레임에 감지 박스와 라벨을 그립니다. (클래스별로 박스를 한 번에 그림)"""
+        if not detections:
+            return
+        try:
+            boxes = detections.boxes
+            class_ids = detections.class_ids
+            
+            # (N, 4, 2) 사각형 꼭짓점 배열
+            x1, y1 = boxes[:, 0], boxes[:, 1]
+            x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+            corners = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1).reshape(-1, 4, 2)
+            
+            # 같은 클래스의 박스는 polylines 한 번으로 그리기
+            for class_id in np.unique(class_ids).tolist():
+                color = self.class_colors[class_id % len(self.class_colors)]
+                cv2.polylines(display_frame, list(corners[class_ids == class_id]), True, color, 2)
+            
+            # 라벨 텍스트
+            for (x, y, _, _), confidence, class_id in zip(boxes.tolist(),
+                                                          detections.confidences.tolist(),
+                                                          class_ids.tolist()):
+                color = self.class_colors[class_id % len(self.class_colors)]
+                text = f"{self.class_labels[class_id % len(self.class_labels)]}: {confidence:.2f}"
+                cv2.putText(display_frame, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        except Exception as e:
+            print(f"프레임에 박스 그리기 중 오류: {e}")
+                
+    def _queue_recording_frame(self, ref, timestamp):
+        """녹화 중이면 프레임을 녹화 전용 링 버퍼에 복사해 녹화 큐에 추가합니다.
+
+        공유 링 버퍼 슬롯을 잡고 있지 않으므로 인코딩이 밀려도 캡처와 실시간 스트림은 계속됩니다.
+        """
+        if not self.is_recording:
+            return
+        try:
+            copy = self.recording_ring.acquire(ref.array.shape, ref.array.dtype)
+            if copy is None or self.recording_frames.full():
+                # 대기열이 가득 차면 가장 오래된 프레임을 버리고 그 슬롯을 사용
+                try:
+                    self.recording_frames.get_nowait()[1].release()
+                except queue.Empty:
+                    pass
+                self.recording_dropped += 1
+                if self.recording_dropped == 1 or self.recording_dropped % 100 == 0:
+                    print(f"⚠️ 녹화 인코딩이 밀려 프레임을 버렸습니다. (이번 녹화에서 {self.recording_dropped}개)")
+                if copy is None:
+                    copy = self.recording_ring.acquire(ref.array.shape, ref.array.dtype)
+                    if copy is None:
+                        return
+            np.copyto(copy.array, ref.array)
+            # 새 프레임 추가 (녹화 작업자가 캡처 시각과 함께 기록 후 release)
+            self.recording_frames.put((timestamp, copy))
+        except Exception as e:
+            print(f"녹화 프레임 추가 중 오류: {e}")
+            
+    def _copy_display_frame(self, frame):
+        """감지 박스를 그릴 화면 표시용 프레임을 재사용 버퍼에 복사합니다."""
+        if self._display_buffer is None or self._display_buffer.shape != frame.shape:
+            self._display_buffer = np.empty_like(frame)
+        np.copyto(self._display_buffer, frame)
+        return self._display_buffer
+        
+    def _encode_stream_frame(self, display_frame, level=DEFAULT_LEVEL):
+        """스트리밍용으로 프레임을 화질 단계에 맞게 축소하고 JPEG로 인코딩합니다."""
+        width, height, _, _ = QUALITY_LEVELS[level]
+        # 프레임 크기 줄이기 (해상도 감소) - 단계별로 미리 할당한 버퍼에 축소
+        if display_frame.shape[1] != width or display_frame.shape[0] != height:
+            resized = self._resize_buffers.get(level)
+            if resized is None or resized.shape[2:] != display_frame.shape[2:]:
+                resized = np.empty((height, width) + display_frame.shape[2:], dtype=display_frame.dtype)
+                self._resize_buffers[level] = resized
+            display_frame = cv2.resize(display_frame, (width, height), dst=resized)
+        # 품질 감소 (압축률 증가)
+        _, buffer = cv2.imencode('.jpg', display_frame, self._encode_params[level])
+        return buffer.tobytes()
+        
+    def _prepare_stream_frame(self, seq, display_frame):
+        """시청자들이 사용하는 화질 단계별로 프레임을 한 번씩만 인코딩합니다."""
+        stream_frame = StreamFrame(seq, display_frame, self.detections.to_info(),
+                                   self.last_frame_timestamp, encoder=self._encode_stream_frame)
+        stream_frame.prepare(self.broadcaster.active_levels())
+        # 화면 표시용 버퍼는 다음 프레임에서 재사용하므로 인코딩 후 참조를 끊음
+        stream_frame.release_image()
+        return stream_frame
+        
+    def _publish_frame(self, stream_frame):
+        """인코딩된 프레임과 감지 정보를 시청자들에게 전송합니다."""
+        # 모든 시청자가 같은 인코딩 결과를 공유
+        self.broadcaster.publish(stream_frame)
         
     def process_frame(self):
         """프레임을 처리하고 웹으로 전송합니다."""
         retry_count = 0
         max_retries = 3
         frame_count = 0
-        last_successful_frame_time = time.time()
         last_detection_time = time.time()
-        detection_interval = 0.08  # 객체 감지 간격 (초)
-        
-        # 메모리 관리를 위한 변수
-        gc_interval = 500  # 500프레임마다 가비지 컬렉션 수행
-        gc_counter = 0
+        detection_interval = self.detection_interval
         
         print("프레임 처리 스레드 시작됨...")
         
         while self.running:
+            ref = None
             try:
-                # 카메라가 없거나 열려있지 않으면 재초기화
-                if not self.cap or not self.cap.isOpened():
-                    print("카메라가 열려있지 않습니다. 재초기화 중...")
-                    if not self.initialize_camera():
-                        print("카메라 초기화 실패, 2초 후 재시도")
-                        time.sleep(2)
-                        continue
-                    retry_count = 0
-                    time.sleep(0.5)
+                ref = self._read_camera_frame()
+                if ref is None:
                     continue
+                frame = ref.array
                 
-                # 프레임 읽기
-                ret, frame = self.cap.read()
-                
-                # 유효하지 않은 프레임인 경우
-                if not ret or frame is None or frame.size == 0 or np.all(frame == 0):
-                    retry_count += 1
-                    print(f"유효하지 않은 프레임: 재시도 {retry_count}/{max_retries}")
-                    
-                    # 너무 오랜 시간 동안 유효한 프레임이 없으면 카메라 재초기화
-                    current_time = time.time()
-                    if current_time - last_successful_frame_time > 5:  # 5초 이상 프레임이 없으면
-                        print("장시간 유효한 프레임이 없습니다. 카메라 재초기화 중...")
-                        if self.cap is not None:
-                            self.cap.release()
-                            self.cap = None
-                            self.camera_initialized = False
-                        
-                        # 재초기화 시도
-                        if not self.initialize_camera():
-                            print("카메라 재초기화 실패")
-                            time.sleep(2)
-                            continue
-                            
-                        retry_count = 0
-                        last_successful_frame_time = current_time
-                    
-                    # 최대 재시도 횟수 초과 시 잠시 대기
-                    if retry_count >= max_retries:
-                        print("최대 재시도 횟수 초과. 잠시 대기 후 계속...")
-                        time.sleep(1)
-                        retry_count = 0
-                    
-                    time.sleep(0.1)
-                    continue
-                
-                # 성공적으로 프레임을 읽은 경우
-                retry_count = 0
-                last_successful_frame_time = time.time()
                 frame_count += 1
-                gc_counter += 1
                 
                 # 객체 감지는 일정 간격으로만 수행
                 current_time = time.time()
                 perform_detection = current_time - last_detection_time >= detection_interval
 
-                # 작업용 프레임 복사
-                display_frame = frame.copy()
+                # 작업용 프레임 복사 (재사용 버퍼)
+                display_frame = self._copy_display_frame(frame)
 
                 if perform_detection:
                     try:
                         # 객체 감지 수행
-                        detections = self.detect_objects(frame)
+                        detections = self._run_detection(frame)
                         last_detection_time = current_time
                         
                         # 프레임에 박스 그리기
-                        for label, confidence, (x, y, w, h) in detections:
-                            try:
-                                # 색상 인덱스 확인 및 안전하게 색상 얻기
-                                class_idx = list(self.model.names.values()).index(label) if label in self.model.names.values() else 0
-                                color = self.colors[class_idx % len(self.colors)].tolist()
-                                
-                                # 사각형 및 텍스트 그리기
-                                cv2.rectangle(display_frame, (x, y), (x + w, y + h), color, 2)
-                                text = f"{label}: {confidence:.2f}"
-                                cv2.putText(display_frame, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                            except Exception as e:
-                                print(f"프레임에 박스 그리기 중 오류: {e}")
-
-                        # 알림 처리
-                        if detections:
-                            self.process_notifications(detections)
-                        
-                        # 결과 저장
-                        self.detections = detections
+                        self._draw_detections(display_frame, detections)
                     except Exception as e:
                         print(f"객체 감지 중 오류 발생: {e}")
                 
                 # 프레임 저장 (화면 표시용 프레임 사용)
                 self.frame = display_frame
                 
-                # 녹화 중이면 프레임 추가
-                if self.is_recording:
+                # 녹화 중이면 프레임 추가, 사전 녹화 버퍼는 항상 갱신
+                self._queue_recording_frame(ref, self.last_frame_timestamp)
+                if self.preroll is not None:
+                    self.preroll.push(ref, self.last_frame_timestamp)
+                if self.event_recorder is not None:
+                    self.event_recorder.push(ref, self.last_frame_timestamp)
+                
+                # 시청자가 없으면 인코딩 생략
+                if self.broadcaster.has_viewers():
                     try:
-                        # 큐가 가득 차면 오래된 프레임 제거
-                        if self.recording_frames.full():
-                            try:
-                                self.recording_frames.get_nowait()
-                            except queue.Empty:
-                                pass
-                        # 새 프레임 추가
-                        self.recording_frames.put(frame.copy())
+                        # 웹소켓을 통해 프레임 전송
+                        stream_frame = self._prepare_stream_frame(self.last_frame_seq, display_frame)
+                        self._publish_frame(stream_frame)
                     except Exception as e:
-                        print(f"녹화 프레임 추가 중 오류: {e}")
-                
-                try:
-                    # 웹소켓을 통해 프레임 전송
-                    # 프레임 크기 줄이기 (해상도 감소)
-                    small_frame = cv2.resize(display_frame, (480, 360))
-                    # 품질 감소 (압축률 증가)
-                    _, buffer = cv2.imencode('.jpg', small_frame, [cv2.IMWRITE_JPEG_QUALITY, 65])
-                    frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                    
-                    # 감지된 객체 정보 전송
-                    detection_info = [{"label": label, "confidence": float(confidence)} 
-                                    for label, confidence, _ in self.detections]
-                    
-                    # 'broadcast' 파라미터 없이 emit 호출
-                    socketio.emit('frame', {
-                        'image': frame_base64,
-                        'detections': detection_info
-                    })
-                    
-                    # 메모리 관리: 참조 해제
-                    del buffer
-                    del frame_base64
-                    del small_frame
-                    
-                except Exception as e:
-                    print(f"프레임 전송 중 오류 발생: {e}")
-                
-                # 메모리 관리 (주기적 GC)
-                if gc_counter >= gc_interval:
-                    gc_counter = 0
-                    gc.collect()  # 가비지 컬렉션 강제 실행
-                
-                # 약 30fps로 제한 (너무 많은 프레임은 전송 부하 유발)
-                time.sleep(0.033)
+                        print(f"프레임 전송 중 오류 발생: {e}")
                 
             except Exception as e:
                 print(f"프레임 처리 중 오류 발생: {e}")
@@ -892,23 +1261,111 @@ class SmartHomeCam:
                 retry_count += 1
                 if retry_count >= max_retries:
                     print("치명적인 오류 발생. 카메라 재초기화 중...")
-                    if self.cap is not None:
-                        self.cap.release()
-                        self.cap = None
-                        self.camera_initialized = False
+                    self._release_camera()
                     try:
                         self.initialize_camera()
                         retry_count = 0
                     except Exception as init_error:
                         print(f"카메라 재초기화 실패: {init_error}")
                         time.sleep(5)  # 잠시 대기 후 다시 시도
+            finally:
+                # 이번 프레임의 링 버퍼 슬롯 반납
+                if ref is not None:
+                    ref.release()
+
+    def _pipeline_capture(self):
+        """[파이프라인] 캡처 단계: 새 프레임을 읽어 패킷으로 만듭니다."""
+        if not self.running:
+            time.sleep(0.1)
+            return None
+        ref = self._read_camera_frame()
+        if ref is None:
+            return None
+        self.frame_seq += 1
+        return FramePacket(self.frame_seq, self.last_frame_timestamp, ref.array, ref=ref)
+        
+    def _pipeline_inference(self, packet):
+        """[파이프라인] 추론 단계: 감지 간격마다 최신 프레임으로 객체를 감지합니다."""
+        if packet.timestamp - self._last_detection_time < self.detection_interval:
+            return None
+        self._last_detection_time = packet.timestamp
+        packet.detections = self._run_detection(packet.frame)
+        return packet
+        
+    def _pipeline_encode(self, packet):
+        """[파이프라인] 주석/인코딩 단계: 최신 감지 결과를 그리고 JPEG로 인코딩합니다."""
+        # 추론 단계와 원본 프레임을 공유하므로 재사용 버퍼에 복사해서 그림
+        display_frame = self._copy_display_frame(packet.frame)
+        self._draw_detections(display_frame, self.detections)
+        self.frame = display_frame
+        self._queue_recording_frame(packet.ref, packet.timestamp)
+        if self.preroll is not None:
+            self.preroll.push(packet.ref, packet.timestamp)
+        if self.event_recorder is not None:
+            self.event_recorder.push(packet.ref, packet.timestamp)
+        
+        packet.display_frame = display_frame
+        
+        # 시청자가 없으면 인코딩/전송 생략
+        if not self.broadcaster.has_viewers():
+            return None
+        packet.stream_frame = self._prepare_stream_frame(packet.seq, display_frame)
+        return packet
+        
+    def _pipeline_fanout(self, packet):
+        """[파이프라인] 전송 단계: 인코딩된 프레임을 시청자별 슬롯으로 나눠 보냅니다."""
+        self._publish_frame(packet.stream_frame)
+        return packet
+        
+    def start_pipeline(self):
+        """캡처/추론/인코딩/전송을 분리된 단계로 실행하는 파이프라인을 시작합니다."""
+        # 단계 사이는 최신 프레임만 유지하는 큐로 연결 (느린 단계가 앞 단계를 막지 않음)
+        # 버려진 패킷은 링 버퍼 슬롯 참조를 반납
+        inference_queue = LatestQueue(maxsize=1, on_drop=FramePacket.release)
+        encode_queue = LatestQueue(maxsize=1, on_drop=FramePacket.release)
+        fanout_queue = LatestQueue(maxsize=2, on_drop=FramePacket.release)
+        
+        self.pipeline = FramePipeline()
+        self.pipeline.add_stage('capture', self._pipeline_capture,
+                                output_queues=[inference_queue, encode_queue])
+        self.pipeline.add_stage('inference', self._pipeline_inference, input_queue=inference_queue)
+        self.pipeline.add_stage('encode', self._pipeline_encode, input_queue=encode_queue,
+                                output_queues=[fanout_queue])
+        self.pipeline.add_stage('fanout', self._pipeline_fanout, input_queue=fanout_queue)
+        self.pipeline.start()
+        
+    def get_pipeline_stats(self):
+        """파이프라인 단계별 FPS/큐 깊이 통계를 반환합니다."""
+        stats = {'enabled': self.pipeline is not None,
+                 'stages': self.pipeline.get_stats() if self.pipeline is not None else {}}
+        stats['frame_ring'] = self.frame_ring.get_stats()
+        stats['recording'] = {'recording': self.is_recording,
+                              'queued': self.recording_frames.qsize(),
+                              'buffer_frames': self.recording_buffer_frames,
+                              'dropped': self.recording_dropped}
+        if self.preroll is not None:
+            stats['preroll'] = self.preroll.get_stats()
+        if self.event_recorder is not None:
+            stats['event_recorder'] = self.event_recorder.get_stats()
+        if self.motion_gate is not None:
+            stats['motion'] = self.motion_gate.get_stats()
+        if self.inference_server is not None:
+            stats['inference_server'] = self.inference_server.get_stats()
+        if storage_manager is not None:
+            stats['storage'] = storage_manager.get_stats()
+        if notification_dispatcher is not None:
+            stats['notifications'] = notification_dispatcher.get_stats()
+        stats['incidents'] = self.incidents.get_stats()
+        if thumbnail_cache is not None:
+            stats['thumbnails'] = thumbnail_cache.get_stats()
+        return stats
 
     def save_snapshot(self, image_data):
         """Base64 이미지 데이터를 받아 스냅샷으로 저장합니다."""
         try:
             # 현재 시간을 기반으로 파일명 생성
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{SNAPSHOTS_DIR}/snapshot_{timestamp}.jpg"
+            filename = f"{SNAPSHOTS_DIR}/snapshot{self.file_tag}_{timestamp}.jpg"
             
             # Base64 이미지 데이터를 디코딩하여 이미지로 변환
             image_bytes = base64.b64decode(image_data)
@@ -939,13 +1396,19 @@ class SmartHomeCam:
             # 현재 시간 기록
             self.recording_start_time = datetime.now()
             timestamp = self.recording_start_time.strftime("%Y%m%d_%H%M%S")
-            filename = f"{RECORDINGS_DIR}/recording_{timestamp}.mp4"
+            filename = f"{RECORDINGS_DIR}/recording{self.file_tag}_{timestamp}.mp4"
+            
+            # 녹화 시작 이전 몇 초 (사전 녹화 버퍼)
+            preroll_frames = self.preroll.snapshot() if self.preroll is not None else []
             
             # 비디오 작성기 초기화 (대기)
+            self.recording_segments = []
+            self.recording_dropped = 0
             self.is_recording = True
             
             # 별도 스레드에서 녹화 작업 시작
-            self.recording_thread = threading.Thread(target=self._recording_worker, args=(filename,))
+            self.recording_thread = threading.Thread(target=self._recording_worker,
+                                                     args=(filename, preroll_frames))
             self.recording_thread.daemon = True
             self.recording_thread.start()
             
@@ -972,9 +1435,11 @@ class SmartHomeCam:
                 
             print("녹화 중지 완료")
             
-            # 저장된 파일명 생성
+            # 저장된 파일명 (세그먼트로 나뉜 경우 첫 번째 세그먼트)
+            if self.recording_segments:
+                return True, self.recording_segments[0]
             timestamp = self.recording_start_time.strftime("%Y%m%d_%H%M%S")
-            filename = f"{RECORDINGS_DIR}/recording_{timestamp}.mp4"
+            filename = f"{RECORDINGS_DIR}/recording{self.file_tag}_{timestamp}.mp4"
             
             return True, filename
             
@@ -982,12 +1447,11 @@ class SmartHomeCam:
             print(f"녹화 중지 중 오류 발생: {e}")
             return False, str(e)
             
-    def _recording_worker(self, filename):
-        """별도 스레드에서 실행되어 녹화를 처리합니다."""
+    def _recording_worker(self, filename, preroll_frames=()):
+        """별도 스레드에서 실행되어 녹화를 처리합니다. (인코딩도 이 스레드에서 수행)"""
         print(f"녹화 작업자 스레드 시작: {filename}")
         
-        video_writer = None
-        frame_size = None
+        writer = None
         
         try:
             # 첫 번째 프레임을 기다립니다 (최대 5초)
@@ -1006,51 +1470,55 @@ class SmartHomeCam:
                 return
                 
             # 프레임 크기 가져오기
-            frame_size = (first_frame.shape[1], first_frame.shape[0])
+            timestamp, ref = first_frame
+            frame_size = (ref.array.shape[1], ref.array.shape[0])
             
-            # 비디오 작성기 초기화
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # MP4 코덱
-            video_writer = cv2.VideoWriter(filename, fourcc, 30.0, frame_size)
+            # 녹화 작성기 초기화 (segment_seconds마다 새 파일, 각 파일은 H.264/PyAV → ffmpeg → OpenCV 순으로 사용 가능한 방식)
+            writer = SegmentedClipWriter(filename, frame_size, self.recording_settings, self.segment_seconds,
+                                         storage_manager, 'recording', self.name)
+            self.recording_segments = writer.segments
             
-            # 첫 번째 프레임 쓰기
-            video_writer.write(first_frame)
+            # 녹화 시작 이전 장면 먼저 기록
+            write_encoded_frames(writer, preroll_frames)
+            if preroll_frames:
+                print(f"사전 녹화 {len(preroll_frames)}프레임 "
+                      f"({preroll_frames[-1].timestamp - preroll_frames[0].timestamp:.1f}초) 기록")
             
-            # 녹화 루프
-            while self.is_recording:
+            # 첫 번째 프레임 쓰기 (기록 후 링 버퍼 슬롯 반납)
+            try:
+                writer.write(ref.array, timestamp)
+            finally:
+                ref.release()
+            
+            # 녹화 루프 (녹화 중지 후에는 남은 프레임까지 기록)
+            while self.is_recording or not self.recording_frames.empty():
                 try:
                     # 큐에서 프레임 가져오기 (최대 0.1초 대기)
-                    frame = self.recording_frames.get(timeout=0.1)
-                    
-                    # 프레임 저장
-                    if frame is not None and frame.size > 0:
-                        video_writer.write(frame)
+                    timestamp, ref = self.recording_frames.get(timeout=0.1)
                 except queue.Empty:
                     # 큐가 비어있으면 계속 진행
-                    pass
+                    continue
+                try:
+                    # 실제 캡처 시각과 함께 프레임 저장
+                    writer.write(ref.array, timestamp)
                 except Exception as e:
                     print(f"프레임 쓰기 중 오류: {e}")
-                    
-            # 남은 프레임 모두 처리
-            while not self.recording_frames.empty():
-                try:
-                    frame = self.recording_frames.get_nowait()
-                    if frame is not None and frame.size > 0:
-                        video_writer.write(frame)
-                except Exception:
-                    pass
+                finally:
+                    ref.release()
                     
         except Exception as e:
             print(f"녹화 작업자 오류: {e}")
         finally:
             # 비디오 작성기 정리
-            if video_writer:
-                video_writer.release()
-                print(f"녹화 파일 저장 완료: {filename}")
+            if writer is not None:
+                writer.close()
+                print(f"녹화 파일 저장 완료: {filename} ({writer.frames}프레임, 세그먼트 {len(writer.segments)}개, "
+                      f"버린 프레임 {self.recording_dropped}개)")
                 
             # 녹화 큐 비우기
             while not self.recording_frames.empty():
                 try:
-                    self.recording_frames.get_nowait()
+                    self.recording_frames.get_nowait()[1].release()
                 except:
                     pass
 
@@ -1059,8 +1527,7 @@ class SmartHomeCam:
         try:
             # 기존 카메라가 있으면 완전히 해제
             if self.cap is not None:
-                self.cap.release()
-                self.cap = None
+                self._release_camera()
                 time.sleep(1)  # 리소스 해제를 위한 대기
                 
             self.running = True
@@ -1075,11 +1542,21 @@ class SmartHomeCam:
                 print("모델 로드 실패!")
                 return False
             
-            # 프레임 처리 스레드 시작
-            print("프레임 처리 스레드 시작...")
-            frame_thread = threading.Thread(target=self.process_frame)
-            frame_thread.daemon = True
-            frame_thread.start()
+            if self.preroll is not None:
+                self.preroll.start()
+            if self.event_recorder is not None:
+                self.event_recorder.start()
+            
+            if self.pipeline_enabled:
+                # 단계별 파이프라인 시작
+                print("프레임 파이프라인 시작...")
+                self.start_pipeline()
+            else:
+                # 프레임 처리 스레드 시작
+                print("프레임 처리 스레드 시작...")
+                frame_thread = threading.Thread(target=self.process_frame)
+                frame_thread.daemon = True
+                frame_thread.start()
             
             print("카메라 시스템 시작 완료")
             return True
@@ -1101,25 +1578,28 @@ def index():
 @requires_auth
 def restart():
     """카메라를 다시 시작하고 메인 페이지로 이동합니다."""
+    cam = get_camera()
+    if cam is None:
+        return '카메라를 찾을 수 없습니다.', 404
     try:
         # 먼저 카메라 정지
-        home_cam.stop()
+        cam.stop()
         time.sleep(1)  # 1초 대기
         
         # 카메라 다시 시작
-        success = home_cam.start()
+        success = cam.start()
         
         # 초기 연결 실패 시 추가 시도
         if not success:
             print("초기 카메라 연결 실패, 3초 후 재시도...")
             time.sleep(3)  # 3초 대기
-            success = home_cam.start()
+            success = cam.start()
             
             # 두 번째 시도도 실패하면 5초 더 대기 후 마지막 시도
             if not success:
                 print("두 번째 카메라 연결 실패, 5초 후 마지막 시도...")
                 time.sleep(5)
-                success = home_cam.start()
+                success = cam.start()
         
         if success:
             return '카메라가 다시 시작되었습니다.'
@@ -1132,9 +1612,12 @@ def restart():
 @requires_auth
 def shutdown():
     """카메라를 정지하고 goodbye 페이지로 이동합니다."""
+    cam = get_camera()
+    if cam is None:
+        return '카메라를 찾을 수 없습니다.', 404
     try:
         # 카메라만 정지
-        home_cam.stop()
+        cam.stop()
         return '카메라가 정지되었습니다.'
     except Exception as e:
         return f"카메라 정지 중 오류: {str(e)}", 500
@@ -1166,13 +1649,16 @@ def favicon():
 @requires_auth
 def snapshot():
     """현재 카메라 화면을 스냅샷으로 저장합니다."""
+    cam = get_camera()
+    if cam is None:
+        return jsonify({'success': False, 'error': '카메라를 찾을 수 없습니다.'}), 404
     try:
         data = request.get_json()
         if not data or 'image' not in data:
             return jsonify({'success': False, 'error': '이미지 데이터가 없습니다.'}), 400
         
         # Base64 이미지 데이터를 저장
-        success, result = home_cam.save_snapshot(data['image'])
+        success, result = cam.save_snapshot(data['image'])
         
         if success:
             # 성공적으로 저장됨
@@ -1189,8 +1675,11 @@ def snapshot():
 @requires_auth
 def start_recording():
     """비디오 녹화를 시작합니다."""
+    cam = get_camera()
+    if cam is None:
+        return jsonify({'success': False, 'error': '카메라를 찾을 수 없습니다.'}), 404
     try:
-        success, result = home_cam.start_recording()
+        success, result = cam.start_recording()
         
         if success:
             return jsonify({'success': True, 'filename': result})
@@ -1205,8 +1694,11 @@ def start_recording():
 @requires_auth
 def stop_recording():
     """비디오 녹화를 중지합니다."""
+    cam = get_camera()
+    if cam is None:
+        return jsonify({'success': False, 'error': '카메라를 찾을 수 없습니다.'}), 404
     try:
-        success, result = home_cam.stop_recording()
+        success, result = cam.stop_recording()
         
         if success:
             return jsonify({'success': True, 'filename': result})
@@ -1217,6 +1709,92 @@ def stop_recording():
         print(f"녹화 중지 처리 중 오류: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/pipeline/stats', methods=['GET'])
+@requires_auth
+def pipeline_stats():
+    """프레임 파이프라인의 단계별 FPS와 큐 깊이를 조회합니다."""
+    cam = get_camera()
+    if cam is None:
+        return jsonify({'success': False, 'error': '카메라를 찾을 수 없습니다.'}), 404
+    try:
+        return jsonify({'success': True, 'data': cam.get_pipeline_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/thumbnails/<incident_id>.jpg')
+@requires_auth_or_signature
+def incident_thumbnail(incident_id):
+    """사건 알림 썸네일을 메모리 캐시에서 제공합니다. (ETag/Cache-Control 지원)"""
+    item = thumbnail_cache.get(incident_id) if thumbnail_cache is not None else None
+    if item is None:
+        return '썸네일을 찾을 수 없습니다.', 404
+    
+    response = Response(item.jpeg, mimetype='image/jpeg')
+    response.set_etag(item.etag)
+    response.headers['Cache-Control'] = f"private, max-age={max(0, int(item.expires - time.time()))}, immutable"
+    # If-None-Match가 일치하면 본문 없이 304 응답
+    return response.make_conditional(request)
+
+@app.route('/video_feed')
+@requires_auth
+def video_feed():
+    """MJPEG(multipart/x-mixed-replace) 스트림을 제공합니다. (?fps=N 으로 프레임 속도 제한)"""
+    cam = get_camera()
+    if cam is None:
+        return '카메라를 찾을 수 없습니다.', 404
+    max_fps = cam.mjpeg_max_fps
+    try:
+        fps = float(request.args.get('fps', max_fps))
+    except ValueError:
+        fps = max_fps
+    fps = max(0.1, min(fps, max_fps))
+    min_interval = 1.0 / fps
+    
+    # 웹소켓 시청자와 같은 인코딩 결과를 공유하는 HTTP 시청자로 등록
+    client_id = f"mjpeg-{os.urandom(4).hex()}"
+    client = cam.broadcaster.add_client(client_id, push=False)
+    print(f"MJPEG 스트림 연결: {client_id} ({request.remote_addr}, 최대 {fps:.1f}fps)")
+    
+    def generate():
+        last_sent = 0
+        try:
+            while client.active:
+                frame = client.get(timeout=1.0)
+                if frame is None:
+                    continue
+                
+                # 연결별 프레임 속도 제한 (대기 중 들어온 더 최신 프레임이 있으면 그것을 사용)
+                wait = min_interval - (time.time() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+                    frame = client.slot.get(timeout=0) or frame
+                last_sent = time.time()
+                
+                jpeg = frame.jpeg()
+                client.sent += 1
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n'
+                       b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' +
+                       jpeg + b'\r\n')
+        finally:
+            cam.broadcaster.remove_client(client_id)
+            print(f"MJPEG 스트림 종료: {client_id}")
+    
+    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-cache, no-store, must-revalidate'})
+
+@app.route('/stream/stats', methods=['GET'])
+@requires_auth
+def stream_stats():
+    """스트림 시청자 수와 시청자별 전송/드롭 통계를 조회합니다."""
+    cam = get_camera()
+    if cam is None:
+        return jsonify({'success': False, 'error': '카메라를 찾을 수 없습니다.'}), 404
+    try:
+        return jsonify({'success': True, 'data': cam.broadcaster.get_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/test-sms', methods=['POST'])
 @requires_auth
 def test_sms():
@@ -1363,10 +1941,18 @@ def test_fcm():
 @socketio.on('connect')
 def handle_connect():
     print('클라이언트가 연결되었습니다')
+    cam = get_camera()
+    if cam is not None:
+        # 터널/프록시를 거친 경우 원래 접속 주소로 LAN/외부 여부 판단 (신뢰하는 프록시의 헤더만 사용)
+        forwarded_for = request.headers.get('CF-Connecting-IP') or request.headers.get('X-Forwarded-For')
+        remote = is_remote_address(request.remote_addr, forwarded_for, cam.trusted_proxies)
+        cam.broadcaster.add_client(request.sid, remote=remote)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('클라이언트가 연결을 끊었습니다')
+    for cam in home_cams.values():
+        cam.broadcaster.remove_client(request.sid)
 
 if __name__ == "__main__":
     # SIGINT (Ctrl+C) 시그널 핸들러 등록
@@ -1852,8 +2438,23 @@ if __name__ == "__main__":
                 status.style.backgroundColor = '#e8f5e9';
             });
             
+            // 카메라 프레임 수신 (바이너리 JPEG 첨부 방식)
+            let currentFrameUrl = null;
+            socket.on('frame_bin', (data, ack) => {
+                if (data.jpeg) {
+                    const previousUrl = currentFrameUrl;
+                    currentFrameUrl = URL.createObjectURL(new Blob([data.jpeg], { type: 'image/jpeg' }));
+                    videoFeed.src = currentFrameUrl;
+                    if (previousUrl) {
+                        URL.revokeObjectURL(previousUrl);
+                    }
+                }
+                if (typeof ack === 'function') ack();
+            });
+            
             // 카메라 프레임 수신
-            socket.on('frame', (data) => {
+            socket.on('frame', (data, ack) => {
+                if (typeof ack === 'function') ack();
                 try {
                     // 이미지 로딩 확인
                     if (data.image) {
@@ -1969,16 +2570,48 @@ if __name__ == "__main__":
         # 프로그램 시작 시 토큰 관리
         firebase_fcm.startup_token_management()
         
+        # 알림 전송 작업자 시작 (감지 알림은 프레임 루프에서 대기열에 넣기만 함)
+        notification_settings = load_settings('notification_settings')
+        notification_dispatcher = NotificationDispatcher.from_config(notification_settings)
+        notification_dispatcher.start()
+        thumbnail_cache = ThumbnailCache.from_config(notification_settings)
+        
         # Cloudflare Tunnel 시작
         cloudflare_tunnel = CloudflareTunnel()
         cloudflare_tunnel.start_tunnel()
         
         # 스마트 홈캠 인스턴스 생성 및 시작
         print("YOLOv5 스마트홈 카메라 시스템 시작 중...")
-        home_cam = SmartHomeCam(camera_id=1, model_type='nano')
-        if not home_cam.start():
+        camera_configs, server_settings = load_camera_settings()
+        
+        # 녹화/스냅샷 폴더 보관 정책 (디스크가 가득 차지 않도록 오래된 파일부터 삭제)
+        storage_manager = StorageManager.from_config([RECORDINGS_DIR, SNAPSHOTS_DIR],
+                                                     os.path.join(RECORDINGS_DIR, 'index.jsonl'),
+                                                     load_settings('storage_settings'))
+        storage_manager.start()
+        inference_server = None
+        if len(camera_configs) > 1:
+            # 다중 카메라: 모델을 한 번만 로드하고 모든 카메라의 추론 요청을 배치로 처리
+            inference_server = InferenceServer(max_batch=server_settings.get('max_batch', 8),
+                                               max_wait=server_settings.get('max_wait_ms', 20) / 1000.0)
+        
+        for camera_config in camera_configs:
+            cam = SmartHomeCam(camera_id=camera_config.get('id', 1),
+                               model_type=camera_config.get('model_type', 'nano'),
+                               name=camera_config.get('name', f"camera{camera_config.get('id', 1)}"),
+                               inference_server=inference_server)
+            if not cam.start():
+                print(f"카메라 '{cam.name}' 시작 실패")
+                continue
+            home_cams[cam.name] = cam
+            if home_cam is None:
+                home_cam = cam
+        
+        if home_cam is None:
             print("카메라 시스템 시작 실패. 프로그램 종료.")
             sys.exit(1)
+        if len(home_cams) > 1:
+            print(f"다중 카메라 모드: {', '.join(home_cams.keys())} (웹 접속 시 ?camera=이름)")
         
         print("=" * 60)
         print("🏠 YOLOv5 스마트홈 카메라 시스템이 시작되었습니다! 🎥")
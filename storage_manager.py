@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+
+
+class StorageManager:
+    """녹화 세그먼트 색인과 보관 정책(전체 용량/보관 기간)을 관리합니다.
+
+    녹화 작성기는 세그먼트를 열고 닫을 때 알려 주며, 닫힌 세그먼트는 색인 파일
+    (JSON Lines)에 기록됩니다. 백그라운드 스레드가 주기적으로 관리 대상 폴더를
+    검사해 max_age를 넘었거나 전체 용량이 max_bytes를 넘는 만큼 가장 오래된
+    파일부터 삭제합니다. 기록 중인 세그먼트는 삭제하지 않습니다.
+    """
+
+    def __init__(self, directories, index_path, max_bytes=20 * 1024 ** 3, max_age_seconds=14 * 86400,
+                 interval=300.0):
+        self.directories = list(directories)
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.interval = interval
+        self.active = set()  # 기록 중인 세그먼트 경로
+        self.total_bytes = 0
+        self.file_count = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.last_check = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, directories, index_path, settings):
+        return cls(directories, index_path,
+                   max_bytes=int(settings.get('max_total_gb', 20) * 1024 ** 3),
+                   max_age_seconds=settings.get('max_age_days', 14) * 86400,
+                   interval=settings.get('check_interval', 300))
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="storage-retention")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+
+    # 세그먼트 색인
+
+    def segment_opened(self, path):
+        with self._lock:
+            self.active.add(os.path.abspath(path))
+
+    def segment_discarded(self, path):
+        """열지 못한 세그먼트의 삭제 보호를 해제합니다. (색인에는 기록하지 않음)"""
+        with self._lock:
+            self.active.discard(os.path.abspath(path))
+
+    def segment_closed(self, path, start_time, end_time, frames, kind='recording', camera=''):
+        """닫힌 세그먼트를 색인에 추가합니다."""
+        entry = {
+            'file': os.path.relpath(path, os.path.dirname(self.index_path) or '.'),
+            'start': round(start_time or 0.0, 3),
+            'end': round(end_time or 0.0, 3),
+            'frames': frames,
+            'bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+            'kind': kind,
+            'camera': camera,
+        }
+        with self._lock:
+            self.active.discard(os.path.abspath(path))
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        # 큰 세그먼트가 연속으로 닫히면 주기를 기다리지 않고 용량 확인
+        if self.total_bytes + entry['bytes'] > self.max_bytes:
+            self._wakeup.set()
+
+    def load_index(self):
+        """색인 항목 목록을 반환합니다."""
+        with self._lock:
+            return self._read_index()
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return []
+        entries = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def _remove_from_index(self, removed_paths):
+        base = os.path.dirname(self.index_path) or '.'
+        entries = [entry for entry in self._read_index()
+                   if os.path.abspath(os.path.join(base, entry['file'])) not in removed_paths]
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(temp_path, self.index_path)
+
+    # 보관 정책
+
+    def _scan(self):
+        """관리 대상 파일을 (수정 시각, 크기, 경로) 목록으로 반환합니다."""
+        index_path = os.path.abspath(self.index_path)
+        files = []
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if not entry.is_file():
+                    continue
+                path = os.path.abspath(entry.path)
+                if path == index_path or path.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        return files
+
+    def enforce(self, now=None):
+        """보관 기간과 전체 용량 한도를 넘는 가장 오래된 파일을 삭제합니다."""
+        now = now or time.time()
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        with self._lock:
+            active = set(self.active)
+
+        removed = set()
+        for mtime, size, path in files:
+            if path in active:
+                continue
+            if now - mtime <= self.max_age_seconds and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"오래된 녹화 파일 삭제 실패: {path} ({e})")
+                continue
+            removed.add(path)
+            total -= size
+            self.evicted_files += 1
+            self.evicted_bytes += size
+
+        if removed:
+            with self._lock:
+                self._remove_from_index(removed)
+            print(f"보관 정책에 따라 파일 {len(removed)}개 삭제 (현재 {total / 1024 ** 2:.0f}MB)")
+
+        self.total_bytes = total
+        self.file_count = len(files) - len(removed)
+        self.last_check = now
+        return removed
+
+    def _run(self):
+        while self.running:
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"보관 정책 적용 중 오류: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def get_stats(self):
+        return {
+            'total_mb': round(self.total_bytes / 1024 ** 2, 1),
+            'max_mb': round(self.max_bytes / 1024 ** 2, 1),
+            'files': self.file_count,
+            'recording_segments': len(self.active),
+            'evicted_files': self.evicted_files,
+            'evicted_mb': round(self.evicted_bytes / 1024 ** 2, 1),
+            'last_check': self.last_check,
+        }
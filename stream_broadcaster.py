@@ -0,0 +1,202 @@
+import base64
+import threading
+import time
+
+from adaptive_quality import AdaptiveQualityController, DEFAULT_LEVEL
+from frame_pipeline import LatestQueue
+
+
+class StreamFrame:
+    """스트림 프레임 한 장 (화질 단계별로 한 번만 인코딩하고 모든 시청자가 공유)"""
+
+    def __init__(self, seq, image, detections, timestamp=None, encoder=None):
+        self.seq = seq
+        self.image = image  # 주석이 그려진 BGR 프레임
+        self.detections = detections  # [{"label", "confidence"}, ...]
+        self.timestamp = timestamp or time.time()
+        self.encoder = encoder  # encoder(image, level) -> JPEG bytes
+        self._jpegs = {}
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def jpeg(self, level=DEFAULT_LEVEL):
+        """해당 화질 단계의 JPEG 바이트를 반환합니다. (최초 요청 시 한 번만 인코딩)"""
+        with self._lock:
+            if level not in self._jpegs:
+                if self.image is None:
+                    # 원본을 이미 놓은 경우 가장 가까운 단계의 인코딩 결과를 사용
+                    level = min(self._jpegs, key=lambda cached: abs(cached - level))
+                else:
+                    self._jpegs[level] = self.encoder(self.image, level)
+            return self._jpegs[level]
+
+    def prepare(self, levels):
+        """시청자들이 사용하는 화질 단계를 미리 인코딩합니다."""
+        for level in levels:
+            self.jpeg(level)
+
+    def release_image(self):
+        """원본 프레임 참조를 놓습니다. (원본 버퍼를 재사용할 때 호출, 최소 한 단계는 인코딩되어 있어야 함)"""
+        with self._lock:
+            if self._jpegs:
+                self.image = None
+
+    def payload(self, transport, level=DEFAULT_LEVEL):
+        """전송 방식/화질 단계별 (이벤트명, 데이터)를 한 번만 만들어 재사용합니다."""
+        jpeg = self.jpeg(level)
+        key = (transport, level)
+        with self._lock:
+            if key not in self._payloads:
+                if transport == 'binary':
+                    self._payloads[key] = ('frame_bin', {
+                        'jpeg': jpeg,
+                        'seq': self.seq,
+                        'detections': self.detections
+                    })
+                else:
+                    self._payloads[key] = ('frame', {
+                        'image': base64.b64encode(jpeg).decode('utf-8'),
+                        'seq': self.seq,
+                        'detections': self.detections
+                    })
+            return self._payloads[key]
+
+
+class StreamClient:
+    """시청자 한 명의 전송 슬롯 (최신 프레임 1개만 보관, 오래된 프레임은 버림)"""
+
+    def __init__(self, client_id, push=True, quality=None):
+        self.client_id = client_id
+        self.push = push  # True: 웹소켓 전송 스레드 사용, False: 호출자가 직접 가져감 (HTTP 등)
+        self.quality = quality  # 적응형 화질 제어기 (없으면 기본 단계 고정)
+        self.slot = LatestQueue(maxsize=1)
+        self.active = True
+        self.connected_at = time.time()
+        self.sent = 0
+        self.acked = 0
+        self.ack_event = threading.Event()
+        self._sent_time = 0.0
+        self.thread = None
+
+    @property
+    def level(self):
+        return self.quality.level if self.quality is not None else DEFAULT_LEVEL
+
+    def on_ack(self, *args):
+        """클라이언트가 프레임 수신을 확인했을 때 호출됩니다."""
+        self.acked += 1
+        if self.quality is not None:
+            self.quality.record_delivery(time.time() - self._sent_time)
+        self.ack_event.set()
+
+    def get(self, timeout=1.0):
+        return self.slot.get(timeout=timeout)
+
+    def get_stats(self):
+        stats = {
+            'sent': self.sent,
+            'acked': self.acked,
+            'dropped': self.slot.dropped,
+            'connected_seconds': int(time.time() - self.connected_at),
+        }
+        if self.quality is not None:
+            stats['quality'] = self.quality.get_stats()
+        return stats
+
+
+class StreamBroadcaster:
+    """프레임을 한 번 인코딩해 여러 시청자에게 나눠 보내는 방송기
+
+    시청자마다 크기 1의 전송 슬롯과 전송 스레드를 두고, 이전 프레임의 수신 확인(ack)이
+    오기 전까지 다음 프레임을 보내지 않습니다. 느린 시청자는 그 사이 슬롯의 프레임이
+    최신 프레임으로 교체되므로 다른 시청자나 캡처 루프를 지연시키지 않습니다.
+    수신 확인 지연은 시청자별 적응형 화질 제어기에 전달되어 화질 단계를 조절합니다.
+    """
+
+    def __init__(self, socketio, transport='binary', ack_timeout=1.0, target_latency=0.3):
+        self.socketio = socketio
+        self.transport = transport
+        self.ack_timeout = ack_timeout
+        self.target_latency = target_latency
+        self.clients = {}
+        self.latest = None
+        self._lock = threading.Lock()
+
+    def add_client(self, client_id, push=True, remote=False):
+        """시청자를 등록합니다. push=True이면 적응형 화질로 웹소켓 전송 스레드를 시작합니다."""
+        quality = AdaptiveQualityController(self.target_latency, remote=remote) if push else None
+        client = StreamClient(client_id, push=push, quality=quality)
+        with self._lock:
+            old_client = self.clients.pop(client_id, None)
+            self.clients[client_id] = client
+        if old_client is not None:
+            old_client.active = False
+
+        if push:
+            client.thread = threading.Thread(target=self._sender_loop, args=(client,),
+                                             name=f"stream-{client_id}")
+            client.thread.daemon = True
+            client.thread.start()
+        return client
+
+    def remove_client(self, client_id):
+        with self._lock:
+            client = self.clients.pop(client_id, None)
+        if client is not None:
+            client.active = False
+            client.ack_event.set()
+
+    def has_viewers(self):
+        with self._lock:
+            return bool(self.clients)
+
+    def viewer_count(self):
+        with self._lock:
+            return len(self.clients)
+
+    def active_levels(self):
+        """현재 시청자들이 사용하는 화질 단계 집합"""
+        with self._lock:
+            return {client.level for client in self.clients.values()}
+
+    def publish(self, frame):
+        """새 프레임을 모든 시청자의 슬롯에 넣습니다."""
+        self.latest = frame
+        with self._lock:
+            clients = list(self.clients.values())
+        for client in clients:
+            client.slot.put(frame)
+
+    def _sender_loop(self, client):
+        last_sent = 0.0
+        while client.active:
+            frame = client.get(timeout=0.5)
+            if frame is None or not client.active:
+                continue
+            try:
+                # 화질 단계별 최대 프레임 속도 유지 (대기 중 들어온 더 최신 프레임이 있으면 그것을 사용)
+                wait = client.quality.frame_interval() - (time.time() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+                    frame = client.slot.get(timeout=0) or frame
+
+                event, payload = frame.payload(self.transport, client.level)
+                client.ack_event.clear()
+                client._sent_time = last_sent = time.time()
+                self.socketio.emit(event, payload, to=client.client_id, callback=client.on_ack)
+                client.sent += 1
+                # 수신 확인이 올 때까지 대기 (그동안 들어온 프레임은 슬롯에서 최신으로 교체됨)
+                if not client.ack_event.wait(self.ack_timeout) and client.active:
+                    client.quality.record_timeout()
+            except Exception as e:
+                print(f"스트림 전송 중 오류 ({client.client_id}): {e}")
+                time.sleep(0.5)
+
+    def get_stats(self):
+        with self._lock:
+            clients = dict(self.clients)
+        return {
+            'viewers': len(clients),
+            'latest_seq': self.latest.seq if self.latest is not None else 0,
+            'clients': {client_id: client.get_stats() for client_id, client in clients.items()},
+        }
@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedThumbnail:
+    """캐시에 보관된 JPEG 썸네일 한 장"""
+
+    __slots__ = ('jpeg', 'etag', 'created', 'expires')
+
+    def __init__(self, jpeg, created, expires):
+        self.jpeg = jpeg
+        self.etag = hashlib.sha1(jpeg).hexdigest()
+        self.created = created
+        self.expires = expires
+
+
+class ThumbnailCache:
+    """알림 썸네일을 메모리에 보관하는 LRU + TTL 캐시
+
+    디스크에 쓰지 않고 인코딩된 JPEG 바이트를 그대로 보관하므로 요청마다 다시
+    인코딩하지 않습니다. 항목 수(max_items)나 전체 크기(max_bytes)를 넘으면 가장
+    오래 사용하지 않은 항목부터 버리고, ttl초가 지난 항목은 조회 시 만료됩니다.
+    """
+
+    def __init__(self, max_items=64, ttl=3600.0, max_bytes=8 * 1024 * 1024):
+        self.max_items = max(1, max_items)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings):
+        return cls(max_items=settings.get('thumbnail_cache_items', 64),
+                   ttl=settings.get('thumbnail_ttl_seconds', 3600),
+                   max_bytes=settings.get('thumbnail_cache_mb', 8) * 1024 * 1024)
+
+    def put(self, key, jpeg):
+        """썸네일을 저장하고 보관된 항목을 반환합니다."""
+        now = time.time()
+        item = CachedThumbnail(jpeg, now, now + self.ttl)
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous.jpeg)
+            self._items[key] = item
+            self.total_bytes += len(jpeg)
+            while self._items and (len(self._items) > self.max_items or self.total_bytes > self.max_bytes):
+                _, evicted = self._items.popitem(last=False)
+                self.total_bytes -= len(evicted.jpeg)
+        return item
+
+    def get(self, key):
+        """보관된 썸네일을 반환합니다. (없거나 만료되었으면 None)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item.expires <= time.time():
+                del self._items[key]
+                self.total_bytes -= len(item.jpeg)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'kilobytes': self.total_bytes // 1024,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_failure REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class TokenStore:
+    """FCM 디바이스 토큰을 보관하는 SQLite 저장소
+
+    토큰 추가/삭제는 행 단위 트랜잭션이라 파일 전체를 다시 쓰지 않으며, WAL 모드로
+    기록 중 프로그램이 종료되어도 데이터가 깨지지 않습니다. Flask 요청 스레드와 알림
+    작업자가 동시에 접근하므로 연결 하나를 잠금으로 보호해 공유합니다. 토큰마다
+    등록 시각, 마지막 확인 시각, 연속 전송 실패 횟수를 함께 기록합니다.
+    처음 열 때 기존 fcm_tokens.json이 있으면 토큰을 한 번 가져옵니다.
+    """
+
+    def __init__(self, path='fcm_tokens.db', legacy_path='fcm_tokens.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        if legacy_path:
+            self._import_legacy(legacy_path)
+
+    def _import_legacy(self, legacy_path):
+        """fcm_tokens.json의 토큰을 한 번만 가져옵니다."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return
+            tokens = []
+            if os.path.exists(legacy_path):
+                try:
+                    with open(legacy_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if isinstance(data, dict) and isinstance(data.get('all'), list):
+                        # 유효한 토큰만 필터링 (길이가 충분한 문자열)
+                        tokens = [token for token in data['all'] if isinstance(token, str) and len(token) > 50]
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"⚠️ 기존 토큰 파일을 읽을 수 없습니다: {e}")
+            now = time.time()
+            with self._conn:
+                self._conn.execute('BEGIN')
+                self._conn.executemany('INSERT OR IGNORE INTO tokens (token, created, last_seen) VALUES (?, ?, ?)',
+                                       [(token, now, now) for token in tokens])
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(now),))
+            if tokens:
+                print(f"✅ {legacy_path}에서 FCM 토큰 {len(tokens)}개를 가져왔습니다.")
+
+    def add(self, token):
+        """토큰을 추가하거나 마지막 확인 시각을 갱신합니다. 새 토큰이면 True를 반환합니다."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute('UPDATE tokens SET last_seen = ?, failures = 0 WHERE token = ?',
+                                        (now, token))
+            if cursor.rowcount:
+                return False
+            self._conn.execute('INSERT INTO tokens (token, created, last_seen) VALUES (?, ?, ?)',
+                               (token, now, now))
+            return True
+
+    def remove(self, tokens):
+        """토큰 목록을 한 트랜잭션으로 삭제하고 삭제한 개수를 반환합니다."""
+        tokens = list(tokens)
+        if not tokens:
+            return 0
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN')
+            cursor = self._conn.executemany('DELETE FROM tokens WHERE token = ?', [(token,) for token in tokens])
+            return cursor.rowcount
+
+    def record_results(self, succeeded=(), failed=()):
+        """전송 결과를 반영합니다. (성공하면 실패 횟수 초기화, 실패하면 증가)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN')
+            self._conn.executemany('UPDATE tokens SET last_seen = ?, failures = 0 WHERE token = ?',
+                                   [(now, token) for token in succeeded])
+            self._conn.executemany('UPDATE tokens SET failures = failures + 1, last_failure = ? WHERE token = ?',
+                                   [(now, token) for token in failed])
+
+    def tokens(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT token FROM tokens')]
+
+    def least_recent(self, keep):
+        """마지막 확인 시각이 오래된 순으로 keep개를 남기고 나머지 토큰을 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute('SELECT token FROM tokens ORDER BY last_seen DESC LIMIT -1 OFFSET ?',
+                                      (keep,)).fetchall()
+        return [row[0] for row in rows]
+
+    def metadata(self, limit=None):
+        """토큰별 정보(등록/마지막 확인 시각, 실패 횟수)를 최근 확인 순으로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute('SELECT token, created, last_seen, failures, last_failure FROM tokens '
+                                      'ORDER BY last_seen DESC LIMIT ?', (limit if limit is not None else -1,))
+            return [{'token': token, 'created': created, 'last_seen': last_seen, 'failures': failures,
+                     'last_failure': last_failure} for token, created, last_seen, failures, last_failure in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
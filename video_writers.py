@@ -0,0 +1,256 @@
+import os
+import shutil
+import subprocess
+from fractions import Fraction
+
+import cv2
+import numpy as np
+
+
+class ClipWriter:
+    """녹화 파일 작성기 공통 인터페이스
+
+    write()는 BGR 프레임과 실제 캡처 시각(초)을 받습니다. 작성기마다 이 시각을
+    사용해 재생 속도가 실제 시간과 어긋나지 않도록 기록합니다.
+    """
+
+    name = 'base'
+
+    def __init__(self, filename, frame_size):
+        self.filename = filename
+        self.frame_size = frame_size  # (width, height)
+        self.start_time = None
+        self.frames = 0
+
+    def write(self, frame, timestamp):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _fit(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size)
+        return frame
+
+
+class _ConstantRateWriter(ClipWriter):
+    """고정 fps 작성기: 캡처 시각에 맞춰 프레임을 반복하거나 건너뛰어 시간 흐름을 맞춤"""
+
+    def __init__(self, filename, frame_size, fps):
+        super().__init__(filename, frame_size)
+        self.fps = fps
+        self._next_index = 0
+
+    def write(self, frame, timestamp):
+        if self.start_time is None:
+            self.start_time = timestamp
+        # 이 프레임이 차지해야 할 마지막 프레임 번호까지 채움 (캡처가 fps보다 빠르면 건너뜀)
+        target = int(round((timestamp - self.start_time) * self.fps))
+        if target < self._next_index:
+            return
+        frame = self._fit(frame)
+        while self._next_index <= target:
+            self._write_frame(frame)
+            self._next_index += 1
+            self.frames += 1
+
+    def _write_frame(self, frame):
+        raise NotImplementedError
+
+
+class OpenCVWriter(_ConstantRateWriter):
+    """cv2.VideoWriter(mp4v) 작성기 - 추가 의존성이 없을 때 사용"""
+
+    name = 'opencv'
+
+    def __init__(self, filename, frame_size, fps=30.0, settings=None):
+        super().__init__(filename, frame_size, fps)
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # MP4 코덱
+        self.writer = cv2.VideoWriter(filename, fourcc, fps, frame_size)
+        if not self.writer.isOpened():
+            raise RuntimeError(f"VideoWriter를 열 수 없습니다: {filename}")
+
+    def _write_frame(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class FFmpegPipeWriter(_ConstantRateWriter):
+    """ffmpeg 프로세스에 원본 프레임을 파이프로 넘겨 H.264로 인코딩하는 작성기"""
+
+    name = 'ffmpeg'
+
+    def __init__(self, filename, frame_size, fps=30.0, settings=None):
+        super().__init__(filename, frame_size, fps)
+        settings = settings or {}
+        ffmpeg = settings.get('ffmpeg_path') or shutil.which('ffmpeg')
+        if not ffmpeg:
+            raise FileNotFoundError("ffmpeg 실행 파일을 찾을 수 없습니다.")
+        width, height = frame_size
+        command = [
+            ffmpeg, '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-c:v', 'libx264', '-preset', settings.get('preset', 'veryfast'),
+            '-crf', str(settings.get('crf', 23)), '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart', filename,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def _write_frame(self, frame):
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=30)
+        except Exception:
+            self.process.kill()
+
+
+class PyAVWriter(ClipWriter):
+    """PyAV(libx264) 작성기 - 실제 캡처 시각을 pts로 기록하는 가변 프레임 속도(VFR) 인코딩"""
+
+    name = 'pyav'
+    time_base = Fraction(1, 1000)  # 밀리초 단위 타임스탬프
+
+    def __init__(self, filename, frame_size, fps=30.0, settings=None):
+        super().__init__(filename, frame_size)
+        import av
+
+        settings = settings or {}
+        self._av = av
+        self.container = av.open(filename, mode='w')
+        try:
+            self.stream = self.container.add_stream('libx264', rate=int(round(fps)))
+            self.stream.width, self.stream.height = frame_size
+            self.stream.pix_fmt = 'yuv420p'
+            self.stream.time_base = self.time_base
+            self.stream.codec_context.time_base = self.time_base
+            self.stream.options = {'preset': settings.get('preset', 'veryfast'),
+                                   'crf': str(settings.get('crf', 23))}
+        except Exception:
+            self.container.close()
+            raise
+        self._last_pts = -1
+
+    def write(self, frame, timestamp):
+        if self.start_time is None:
+            self.start_time = timestamp
+        pts = int(round((timestamp - self.start_time) / self.time_base))
+        pts = max(pts, self._last_pts + 1)  # pts는 반드시 증가해야 함
+        self._last_pts = pts
+
+        video_frame = self._av.VideoFrame.from_ndarray(self._fit(frame), format='bgr24')
+        video_frame.pts = pts
+        video_frame.time_base = self.time_base
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+        self.frames += 1
+
+    def close(self):
+        try:
+            for packet in self.stream.encode():
+                self.container.mux(packet)
+        finally:
+            self.container.close()
+
+
+WRITERS = {
+    'pyav': PyAVWriter,
+    'ffmpeg': FFmpegPipeWriter,
+    'opencv': OpenCVWriter,
+}
+
+
+def create_clip_writer(filename, frame_size, settings=None):
+    """설정에 맞는 녹화 작성기를 만듭니다. 실패하면 다음 방식으로, 마지막에는 OpenCV로 대체합니다."""
+    settings = settings or {}
+    encoder = settings.get('encoder', 'pyav')
+    fps = settings.get('fps', 30.0)
+    candidates = {
+        'pyav': ['pyav', 'ffmpeg', 'opencv'],
+        'ffmpeg': ['ffmpeg', 'opencv'],
+    }.get(encoder, ['opencv'])
+
+    for name in candidates:
+        try:
+            return WRITERS[name](filename, frame_size, fps, settings)
+        except Exception as e:
+            print(f"⚠️ {name} 녹화 작성기를 사용할 수 없습니다: {e}")
+
+    raise RuntimeError("사용 가능한 녹화 작성기가 없습니다.")
+
+
+class SegmentedClipWriter(ClipWriter):
+    """녹화를 고정 길이 세그먼트 파일로 나눠 기록하는 작성기
+
+    filename이 'recording_20240101_120000.mp4'이면 세그먼트는
+    'recording_20240101_120000_000.mp4', '..._001.mp4' 순서로 만들어집니다.
+    캡처 시각 기준으로 segment_seconds가 지나면 현재 파일을 닫고 다음 파일을 엽니다.
+    storage가 주어지면 세그먼트를 열고 닫을 때 알려 색인과 보관 정책에 반영합니다.
+    """
+
+    name = 'segmented'
+
+    def __init__(self, filename, frame_size, settings=None, segment_seconds=60.0, storage=None,
+                 kind='recording', camera=''):
+        super().__init__(filename, frame_size)
+        self.settings = settings or {}
+        self.segment_seconds = segment_seconds
+        self.storage = storage
+        self.kind = kind
+        self.camera = camera
+        self.base, self.extension = os.path.splitext(filename)
+        self.segments = []  # 만들어진 세그먼트 경로
+        self.writer = None
+        self._segment_start = None
+        self._segment_end = None
+
+    @property
+    def current_file(self):
+        return self.segments[-1] if self.writer is not None else None
+
+    def write(self, frame, timestamp):
+        if self.start_time is None:
+            self.start_time = timestamp
+        if self.writer is not None and self.segment_seconds \
+                and timestamp - self._segment_start >= self.segment_seconds:
+            self._close_segment()
+        if self.writer is None:
+            self._open_segment(timestamp)
+        self.writer.write(frame, timestamp)
+        self._segment_end = timestamp
+        self.frames += 1
+
+    def _open_segment(self, timestamp):
+        path = f"{self.base}_{len(self.segments):03d}{self.extension or '.mp4'}"
+        if self.storage is not None:
+            self.storage.segment_opened(path)
+        try:
+            self.writer = create_clip_writer(path, self.frame_size, self.settings)
+        except Exception:
+            # 파일이 만들어지지 않았으므로 색인에 기록하지 않고 삭제 보호만 해제
+            if self.storage is not None:
+                self.storage.segment_discarded(path)
+            raise
+        self.segments.append(path)
+        self._segment_start = timestamp
+        self._segment_end = timestamp
+
+    def _close_segment(self):
+        writer, self.writer = self.writer, None
+        try:
+            writer.close()
+        finally:
+            if self.storage is not None:
+                self.storage.segment_closed(writer.filename, self._segment_start, self._segment_end,
+                                            writer.frames, self.kind, self.camera)
+
+    def close(self):
+        if self.writer is not None:
+            self._close_segment()